@@ -0,0 +1,201 @@
+"""Admission control for the API.
+
+Every request to /items or /orders is put in a route class (read, write,
+bulk, longpoll), and each class has its own concurrency limit. A request
+over the limit waits in a FIFO queue. It is rejected with 503 and
+Retry-After when the queue is full or when it has waited longer than
+ADMISSION_MAX_WAIT_MS. Writers therefore queue here instead of piling up in
+the threadpool, where each one would hold a thread and block on the SQLite
+write lock until it got "database is locked".
+
+The limits are per process. Keep their sum below the AnyIO threadpool size
+(40 by default) so admitted sync endpoints always get a thread.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from app import errors
+from app.database import DATABASE_SHARDS
+
+# Paths outside these prefixes (health, admin, docs) are never queued
+ADMITTED_PREFIXES = ("/items", "/orders")
+BULK_MARKERS = ("/bulk", "/import")
+LONGPOLL_PATHS = ("/orders/changes",)
+READ_METHODS = ("GET", "HEAD")
+
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class for a request, or None if it bypasses admission control."""
+    if method == "OPTIONS" or not path.startswith(ADMITTED_PREFIXES):
+        return None
+    if path.rstrip("/") in LONGPOLL_PATHS:
+        return "longpoll"
+    if any(marker in path for marker in BULK_MARKERS):
+        return "bulk"
+    if method in READ_METHODS or path.endswith("/batch-get"):
+        return "read"
+    return "write"
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionPool:
+    """Concurrency limit with a bounded FIFO wait queue for one route class."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_queue_seen = 0
+        self.waited = 0
+        self.total_wait = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting up to max_wait. Raises Rejected otherwise."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise Rejected("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_queue_seen = max(self.max_queue_seen, len(self._waiters))
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise Rejected("timeout")
+        except asyncio.CancelledError:
+            # Client went away; hand on a slot that was granted meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        # release() handed its slot over to us, so active is unchanged
+        self.admitted += 1
+        self.waited += 1
+        self.total_wait += time.monotonic() - start
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "max_queue_seen": self.max_queue_seen,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_queue_wait_ms": (
+                round(self.total_wait / self.waited * 1000, 2) if self.waited else 0.0
+            ),
+        }
+
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, int], max_queue: int, max_wait: float):
+        self.pools = {
+            name: AdmissionPool(name, limit, max_queue, max_wait)
+            for name, limit in limits.items()
+        }
+
+    def stats(self) -> dict:
+        return {
+            "classes": {name: pool.stats() for name, pool in self.pools.items()},
+            "lock_errors": errors.lock_error_count(),
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits requests through an AdmissionController.
+
+    The slot is held until the response has been sent in full, so streaming
+    responses and request bodies read by import endpoints are covered too.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        pool = self.controller.pools.get(route_class) if route_class else None
+        if pool is None or pool.limit <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await pool.acquire()
+        except Rejected as e:
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server overloaded, retry later", "reason": e.reason},
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release()
+
+
+def _limit(name: str, default: str) -> int:
+    return int(os.getenv(name, default))
+
+
+controller = AdmissionController(
+    limits={
+        "read": _limit("ADMISSION_READ_CONCURRENCY", "24"),
+        # SQLite takes one writer at a time per file; a few slots per shard
+        # keep the next statements ready without piling up on the lock
+        "write": _limit("ADMISSION_WRITE_CONCURRENCY", str(4 * DATABASE_SHARDS)),
+        "bulk": _limit("ADMISSION_BULK_CONCURRENCY", "2"),
+        # Long polls hold a thread for up to `wait` seconds
+        "longpoll": _limit("ADMISSION_LONGPOLL_CONCURRENCY", "8"),
+    },
+    max_queue=_limit("ADMISSION_MAX_QUEUE", "64"),
+    max_wait=float(os.getenv("ADMISSION_MAX_WAIT_MS", "2000")) / 1000,
+)
@@ -0,0 +1,151 @@
+"""Archival of old orders into a separate database file per shard.
+
+Orders in a terminal status (completed, refunded) that have not changed for
+ORDERS_ARCHIVE_AFTER_DAYS are moved in batches from `orders` into the
+`orders` table of the shard's archive file (app.archive.db next to app.db),
+which is ATTACHed as `archive`. Each batch is copied and deleted in one
+transaction, so `orders` and its indexes only hold recent and open orders.
+
+Archived orders are read-only and only returned by reads that pass
+include_archived=true. Their numbers are not reused: new order numbers are
+taken above the shard's high-water mark (migration 011), which archiving and
+purging do not lower. Moving a row out of `orders` logs a delete in the
+change feed.
+Runs as a task of the maintenance scheduler (app/maintenance.py).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.database import (
+    DATABASE_SHARDS,
+    TIMESTAMP_FORMAT,
+    archive_path,
+    attach,
+    database_exists,
+    get_db,
+    shard_paths,
+    utc_now,
+)
+
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ORDERS_ARCHIVE_INTERVAL", "0"))
+ARCHIVE_AFTER_DAYS = float(os.getenv("ORDERS_ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ORDERS_ARCHIVE_BATCH_SIZE", "500"))
+# Pause between batches so queued writers can take the lock
+ARCHIVE_BATCH_PAUSE_SECONDS = 0.05
+ARCHIVE_STATUSES = ("completed", "refunded")
+
+ARCHIVED_COLUMNS = """
+    id, order_number, customer_name, customer_email, customer_avatar,
+    order_date, status, total_amount, payment_status,
+    created_at, updated_at, deleted_at
+"""
+
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.orders (
+        id TEXT PRIMARY KEY,
+        order_number TEXT NOT NULL,
+        customer_name TEXT NOT NULL,
+        customer_email TEXT NOT NULL,
+        customer_avatar TEXT,
+        order_date TEXT,
+        status TEXT NOT NULL,
+        total_amount REAL NOT NULL,
+        payment_status TEXT NOT NULL,
+        created_at TEXT,
+        updated_at TEXT,
+        deleted_at TEXT,
+        archived_at TEXT NOT NULL
+    )
+    """,
+    # Same orderings as the hot table's list and stats queries
+    "CREATE INDEX IF NOT EXISTS archive.idx_orders_created_at ON orders(created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_orders_status ON orders(status)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_orders_order_date ON orders(order_date)",
+]
+
+
+def attach_archive(conn: sqlite3.Connection, shard: int) -> bool:
+    """ATTACH the shard's archive as `archive`; False if nothing was archived yet.
+
+    Must be called outside a transaction.
+    """
+    path = archive_path(shard_paths()[shard])
+    if not database_exists(path):
+        return False
+    attach(conn, path, "archive")
+    row = conn.execute(
+        "SELECT 1 FROM archive.sqlite_master WHERE type = 'table' AND name = 'orders'"
+    ).fetchone()
+    return row is not None
+
+
+def archive_orders(
+    after_days: float = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = ARCHIVE_BATCH_PAUSE_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+) -> dict:
+    """Archive every shard; see archive_shard."""
+    archived = 0
+    for shard in range(DATABASE_SHARDS):
+        archived += archive_shard(shard, after_days, batch_size, pause, stop_event)
+    return {"archived": archived}
+
+
+def archive_shard(
+    shard: int,
+    after_days: float = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = ARCHIVE_BATCH_PAUSE_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+) -> int:
+    """Move archivable orders of one shard batch by batch; returns the count."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=after_days)).strftime(TIMESTAMP_FORMAT)
+    statuses = ", ".join(f"'{status}'" for status in ARCHIVE_STATUSES)
+    archived = 0
+    while stop_event is None or not stop_event.is_set():
+        with get_db(shard) as conn:
+            attach(conn, archive_path(shard_paths()[shard]), "archive")
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for statement in ARCHIVE_SCHEMA:
+                cursor.execute(statement)
+            # Walks the partial index of migration 009 (without statistics the
+            # planner prefers the status index)
+            cursor.execute(
+                f"""
+                SELECT id FROM main.orders INDEXED BY idx_orders_archive_candidates
+                WHERE status IN ({statuses}) AND deleted_at IS NULL AND updated_at < ?
+                LIMIT ?
+                """,
+                (cutoff, batch_size),
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if ids:
+                ids_json = json.dumps(ids)
+                # OR REPLACE: a crash between the two files' commits can leave
+                # a row in both; the next run then moves it again
+                cursor.execute(
+                    f"""
+                    INSERT OR REPLACE INTO archive.orders ({ARCHIVED_COLUMNS}, archived_at)
+                    SELECT {ARCHIVED_COLUMNS}, ? FROM main.orders
+                    WHERE id IN (SELECT value FROM json_each(?))
+                    """,
+                    (utc_now(), ids_json),
+                )
+                cursor.execute(
+                    "DELETE FROM main.orders WHERE id IN (SELECT value FROM json_each(?))",
+                    (ids_json,),
+                )
+        archived += len(ids)
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return archived
@@ -0,0 +1,172 @@
+"""Online backups of the database.
+
+Each shard is copied with SQLite's backup API, BACKUP_PAGES_PER_STEP pages
+at a time with a pause between steps. The source connection holds one read
+transaction for the whole copy, so the snapshot is consistent as of its
+start and, with WAL, writers keep committing meanwhile (a backup that reads
+outside a transaction would restart whenever another connection writes).
+Shards (and their order archives, app/archive.py) are copied one after the
+other; a snapshot is consistent per file, not across files.
+
+A snapshot is written as `<name>-<UTC timestamp>.db` plus `.shard<i>` and
+`.archive` files named like the live ones, so it can be loaded with DATABASE_SNAPSHOT, and
+optionally gzip-compressed. Only the newest BACKUP_KEEP snapshots are kept.
+Used by backup.py and the `backup` maintenance task.
+"""
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from app.database import (
+    DATABASE_PATH,
+    IN_MEMORY,
+    archive_path,
+    connect,
+    database_exists,
+    shard_files,
+    shard_paths,
+)
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+# Pause between steps, giving the disk (and in-memory writers) room
+BACKUP_STEP_PAUSE_SECONDS = float(os.getenv("BACKUP_STEP_PAUSE_MS", "10")) / 1000
+BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "0") == "1"
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+
+# progress(label, pages_copied, pages_total), label like "shard 0"
+Progress = Callable[[str, int, int], None]
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+def _snapshot_name() -> str:
+    stem = "app" if IN_MEMORY else os.path.splitext(os.path.basename(DATABASE_PATH))[0]
+    return f"{stem}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.db"
+
+
+def backup_file(
+    source_path: str,
+    target_path: str,
+    label: str,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    pause: float = BACKUP_STEP_PAUSE_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+    progress: Optional[Progress] = None,
+) -> int:
+    """Copy one database to target_path; returns the number of pages copied."""
+    source = connect(source_path)
+    target = sqlite3.connect(target_path)
+    copied = 0
+
+    def step(status, remaining, total):
+        nonlocal copied
+        copied = total - remaining
+        if progress is not None:
+            progress(label, copied, total)
+        if stop_event is not None and stop_event.is_set():
+            raise BackupCancelled("Backup cancelled")
+        if remaining:
+            time.sleep(pause)
+
+    try:
+        # Pin one snapshot of the source for every step of the copy
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(1) FROM sqlite_master").fetchone()
+        source.backup(target, pages=pages, progress=step)
+    finally:
+        source.rollback()
+        source.close()
+        target.close()
+    return copied
+
+
+def _compress(path: str) -> str:
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
+    return path + ".gz"
+
+
+def list_backups(directory: str = BACKUP_DIR) -> List[str]:
+    """Shard 0 files of the snapshots in `directory`, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    pattern = re.compile(r"-\d{8}T\d{6}Z\.db(\.gz)?$")
+    return sorted(name for name in os.listdir(directory) if pattern.search(name))
+
+
+def prune_backups(directory: str = BACKUP_DIR, keep: int = BACKUP_KEEP) -> List[str]:
+    """Delete all but the newest `keep` snapshots, shard and archive files included."""
+    if keep <= 0:
+        return []
+    removed = []
+    for name in list_backups(directory)[:-keep]:
+        # <root>.db[.gz], <root>.shard<i>.db[.gz], <root>[.shard<i>].archive.db[.gz]
+        # and any -wal/-shm left by opening them
+        root = name[: name.index(".db")]
+        for other in os.listdir(directory):
+            if other.startswith(root + "."):
+                os.remove(os.path.join(directory, other))
+                removed.append(other)
+    return removed
+
+
+def backup_database(
+    directory: str = BACKUP_DIR,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    pause: float = BACKUP_STEP_PAUSE_SECONDS,
+    compress: bool = BACKUP_COMPRESS,
+    keep: int = BACKUP_KEEP,
+    stop_event: Optional[threading.Event] = None,
+    progress: Optional[Progress] = None,
+) -> dict:
+    """Write a snapshot of every shard to `directory`; see the module docstring."""
+    os.makedirs(directory, exist_ok=True)
+    copies = []
+    for shard, (live, target) in enumerate(
+        zip(shard_paths(), shard_files(os.path.join(directory, _snapshot_name())))
+    ):
+        copies.append((live, target, f"shard {shard}"))
+        if database_exists(archive_path(live)):
+            copies.append((archive_path(live), archive_path(target), f"shard {shard} archive"))
+    targets = [target for _, target, _ in copies]
+    if any(os.path.exists(target) or os.path.exists(target + ".gz") for target in targets):
+        raise FileExistsError(f"Snapshot {targets[0]} already exists")
+    start = time.perf_counter()
+    total_pages = 0
+    total_bytes = 0
+    files = []
+    try:
+        for source, target, label in copies:
+            partial = target + ".partial"
+            total_pages += backup_file(source, partial, label, pages, pause, stop_event, progress)
+            total_bytes += os.path.getsize(partial)
+            os.replace(partial, target)
+            files.append(_compress(target) if compress else target)
+    except BaseException:
+        # Only this run's files: never leave a partial snapshot behind
+        for target in targets:
+            for leftover in (target + ".partial", target, target + ".gz"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        raise
+    elapsed = time.perf_counter() - start
+    return {
+        "files": files,
+        "pages": total_pages,
+        "bytes": total_bytes,
+        "stored_bytes": sum(os.path.getsize(path) for path in files),
+        "seconds": round(elapsed, 3),
+        "mib_per_second": round(total_bytes / 2**20 / elapsed, 2) if elapsed else None,
+        "pruned": prune_backups(directory, keep),
+    }
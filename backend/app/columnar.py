@@ -0,0 +1,138 @@
+"""Columnar JSON encoding of list responses, negotiated with the Accept header.
+
+Clients that send `Accept: application/vnd.columnar+json` get the records of
+a list response (the `orders` of GET /orders, the `items` of GET /items) as
+one list of column names plus the values, instead of one object per record.
+Nested objects are flattened into dotted names (`customer.name`). Two
+layouts, chosen with a media type parameter:
+
+- `layout=rows` (default): {"columns": [...], "rows": [[...], ...]}
+- `layout=columns`: {"columns": [...], "data": [[...column 0...], ...]}
+
+Columnar is used only when the client prefers it over plain JSON by q-value.
+The rest of the response (total, page, ...) is unchanged. The body is
+encoded directly, skipping FastAPI's jsonable_encoder, and gzip-compressed
+when the client accepts gzip and it is at least GZIP_MIN_BYTES. Plain JSON
+stays the default. Routes put the negotiated Format into their ETag, since
+each format is a different representation.
+"""
+
+import gzip
+import json
+from operator import itemgetter
+from typing import Any, Callable, List, NamedTuple, Optional
+
+from fastapi import HTTPException, Request, Response
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.columnar+json"
+LAYOUTS = ("rows", "columns")
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+# Sent on list responses in every format, so caches keep them apart
+VARY = "Accept, Accept-Encoding"
+
+
+class Format(NamedTuple):
+    layout: str
+    gzip: bool
+
+
+def _media_ranges(header: str):
+    """(media type, parameters) of each entry of an Accept-style header."""
+    for entry in header.split(","):
+        media, *params = [part.strip() for part in entry.split(";")]
+        options = {}
+        for param in params:
+            name, _, value = param.partition("=")
+            options[name.strip().lower()] = value.strip().strip('"')
+        yield media.lower(), options
+
+
+def _quality(options: dict) -> float:
+    try:
+        return float(options.get("q", "1"))
+    except ValueError:
+        return 0.0
+
+
+# Media ranges that match plain JSON, most specific first
+JSON_RANGES = ("application/json", "application/*", "*/*")
+
+
+def negotiate(request: Request) -> Optional[Format]:
+    """The columnar format the client asked for, or None for plain JSON.
+
+    Columnar must be named explicitly, with a q-value at least that of the
+    most specific range matching application/json.
+    """
+    accept = request.headers.get("accept", "")
+    columnar = None
+    json_q = {}
+    for media, options in _media_ranges(accept):
+        if media == COLUMNAR_MEDIA_TYPE:
+            if columnar is None or _quality(options) > _quality(columnar):
+                columnar = options
+        elif media in JSON_RANGES:
+            json_q.setdefault(media, _quality(options))
+    if columnar is None or _quality(columnar) <= 0:
+        return None
+    if _quality(columnar) < next((json_q[media] for media in JSON_RANGES if media in json_q), 0.0):
+        return None
+    layout = columnar.get("layout", "rows")
+    if layout not in LAYOUTS:
+        raise HTTPException(status_code=406, detail=f"Unknown layout: {layout}")
+    gzip_ok = any(
+        coding in ("gzip", "*") and _quality(coding_options) > 0
+        for coding, coding_options in _media_ranges(request.headers.get("accept-encoding", ""))
+    )
+    return Format(layout, gzip_ok)
+
+
+def column_names(record: dict) -> List[str]:
+    """Column names of a record, nested objects flattened into dotted names."""
+    names = []
+    for key, value in record.items():
+        if isinstance(value, dict):
+            names.extend(f"{key}.{sub}" for sub in value)
+        else:
+            names.append(key)
+    return names
+
+
+def _getter(name: str) -> Callable[[dict], Any]:
+    key, _, sub = name.partition(".")
+    if not sub:
+        return itemgetter(key)
+    return lambda record: record[key][sub]
+
+
+def to_table(records: List[dict], layout: str, columns: Optional[List[str]] = None) -> dict:
+    """Encode records as column names plus rows or column arrays."""
+    if columns is None:
+        columns = column_names(records[0]) if records else []
+    getters = [_getter(name) for name in columns]
+    if layout == "rows":
+        return {"columns": columns, "rows": [[get(record) for get in getters] for record in records]}
+    return {"columns": columns, "data": [[get(record) for record in records] for get in getters]}
+
+
+def columnar_response(
+    body: dict,
+    key: str,
+    fmt: Format,
+    columns: Optional[List[str]] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """Response with body[key] (a list of records) in the columnar format."""
+    body = dict(body)
+    body[key] = to_table(body[key], fmt.layout, columns)
+    content = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = dict(headers or {}, Vary=VARY)
+    if fmt.gzip and len(content) >= GZIP_MIN_BYTES:
+        # mtime=0: the same body always compresses to the same bytes (strong ETag)
+        content = gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+    return Response(
+        content, media_type=f"{COLUMNAR_MEDIA_TYPE}; layout={fmt.layout}", headers=headers
+    )
@@ -0,0 +1,111 @@
+"""Helpers for conditional GETs (ETag / Last-Modified / 304 Not Modified)."""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+
+
+def table_version(conn, name: str) -> Tuple[int, Optional[str]]:
+    """Return (version, updated_at) for a table tracked in _table_versions."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT version, updated_at FROM _table_versions WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    if row is None:
+        return 0, None
+    return row[0], row[1]
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the given parts."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def to_http_date(timestamp: Optional[str]) -> Optional[str]:
+    """Convert a stored SQLite timestamp (UTC) into an HTTP-date."""
+    if not timestamp:
+        return None
+    try:
+        dt = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [c.strip() for c in header.split(",")]
+    return any(c[2:] == etag if c.startswith("W/") else c == etag for c in candidates)
+
+
+def _settled(modified: datetime) -> bool:
+    """Whether no write can still land in the (one-second) timestamp `modified`."""
+    return modified < datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _not_modified_since(header: str, last_modified: str) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+        modified = parsedate_to_datetime(last_modified)
+    except (TypeError, ValueError):
+        return False
+    return modified <= since and _settled(modified)
+
+
+def validator_headers(etag: str, last_modified: Optional[str] = None) -> dict:
+    """ETag, plus Last-Modified once its second is over.
+
+    Timestamps have one-second resolution, so a Last-Modified of the current
+    second could also stand for a later write in that second; clients then
+    revalidate with the ETag alone.
+    """
+    headers = {"ETag": etag}
+    if last_modified:
+        try:
+            settled = _settled(parsedate_to_datetime(last_modified))
+        except (TypeError, ValueError):
+            settled = False
+        if settled:
+            headers["Last-Modified"] = last_modified
+    return headers
+
+
+def not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[str] = None,
+    vary: Optional[str] = None,
+) -> Optional[Response]:
+    """Return a 304 response if the request's validators still match.
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+    If-Modified-Since only matches a Last-Modified older than the current
+    second (see validator_headers).
+    `vary` is repeated on the 304, as the full response would send it.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        matched = bool(
+            if_modified_since
+            and last_modified
+            and _not_modified_since(if_modified_since, last_modified)
+        )
+    if not matched:
+        return None
+    headers = validator_headers(etag, last_modified)
+    if vary:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
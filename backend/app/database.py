@@ -1,27 +1,233 @@
+import contextvars
 import os
 import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
+from datetime import datetime, timezone
+from typing import Callable, Dict, Generator, Iterable, List, Optional, TypeVar
+
+from app.profiling import connection_factory
 
 DATABASE_PATH = os.getenv("DATABASE_PATH", "app.db")
 
+# DATABASE_PATH=":memory:" keeps every shard in process memory, shared by all
+# connections of the process (SQLite's memdb VFS). A keeper connection holds
+# each database open for the life of the process; it starts as a copy of
+# DATABASE_SNAPSHOT (and its shard and archive files) when that is set,
+# else empty.
+IN_MEMORY = DATABASE_PATH == ":memory:"
+DATABASE_SNAPSHOT = os.getenv("DATABASE_SNAPSHOT")
+
+# Orders are spread over this many SQLite files by a hash of their id.
+# Shard 0 is DATABASE_PATH itself and also holds every other table (items);
+# shard i > 0 lives next to it as <name>.shard<i><ext>. With one shard
+# (the default) there is a single file and nothing is routed.
+DATABASE_SHARDS = max(1, int(os.getenv("DATABASE_SHARDS", "1")))
+
+# Order timestamps (created_at, updated_at, deleted_at) are UTC, in one
+# format, so they compare as strings and convert to HTTP dates as they are
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+# SQL expression for the current time in that format (CURRENT_TIMESTAMP has a space)
+NOW_SQL = f"strftime('{TIMESTAMP_FORMAT}', 'now')"
+
+T = TypeVar("T")
+_fan_out_pool: Optional[ThreadPoolExecutor] = None
+_fan_out_pool_lock = threading.Lock()
+
+# Bumped after every commit that changed rows, so long-polling readers can
+# wake up as soon as new data is visible instead of sleeping a fixed interval.
+_commit_condition = threading.Condition()
+_commit_generation = 0
+
+# Called with the connection after each get_db() commit that changed rows
+_commit_listeners: List[Callable[[sqlite3.Connection], None]] = []
+
+_keepers: Dict[str, sqlite3.Connection] = {}
+_keepers_lock = threading.Lock()
+
+
+def utc_now() -> str:
+    """The current time as an order timestamp (see TIMESTAMP_FORMAT)."""
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def shard_files(path: str) -> List[str]:
+    """Files of each shard of the database at `path`, shard 0 first."""
+    root, ext = os.path.splitext(path)
+    return [path] + [f"{root}.shard{shard}{ext}" for shard in range(1, DATABASE_SHARDS)]
+
+
+def shard_paths() -> List[str]:
+    """Database path (a URI when in memory) of each shard, shard 0 first."""
+    if IN_MEMORY:
+        return [f"file:/app-shard{shard}?vfs=memdb" for shard in range(DATABASE_SHARDS)]
+    return shard_files(DATABASE_PATH)
+
+
+def archive_path(path: str) -> str:
+    """Archive database (app/archive.py) of the shard at `path`."""
+    if path.startswith("file:"):
+        return path.replace("?", "-archive?", 1)
+    root, ext = os.path.splitext(path)
+    return f"{root}.archive{ext}"
+
+
+def _open_keeper(path: str, snapshot: Optional[str] = None) -> None:
+    keeper = sqlite3.connect(path, uri=True, check_same_thread=False)
+    if snapshot:
+        source = sqlite3.connect(snapshot)
+        try:
+            image = bytearray(source.serialize())
+        finally:
+            source.close()
+        # memdb cannot open a WAL database: mark the image rollback-journal
+        # (header bytes 18-19) before copying it into the shared database
+        image[18:20] = b"\x01\x01"
+        staging = sqlite3.connect(":memory:")
+        staging.deserialize(bytes(image))
+        staging.backup(keeper)
+        staging.close()
+    _keepers[path] = keeper
+
+
+def _keep_alive(path: str) -> None:
+    """Open the keeper connection of an in-memory database, loading its snapshot."""
+    with _keepers_lock:
+        if path in _keepers:
+            return
+        if not DATABASE_SNAPSHOT or path not in shard_paths():
+            _open_keeper(path)
+            return
+        snapshot = shard_files(DATABASE_SNAPSHOT)[shard_paths().index(path)]
+        if not os.path.exists(snapshot):
+            raise FileNotFoundError(f"Database snapshot {snapshot} not found")
+        _open_keeper(path, snapshot)
+        if os.path.exists(archive_path(snapshot)) and archive_path(path) not in _keepers:
+            _open_keeper(archive_path(path), archive_path(snapshot))
+
+
+def connect(path: str, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect() for a shard path, including in-memory shard URIs."""
+    if IN_MEMORY:
+        _keep_alive(path)
+    return sqlite3.connect(path, uri=True, **kwargs)
+
+
+def database_exists(path: str) -> bool:
+    if IN_MEMORY:
+        return path in _keepers
+    return os.path.exists(path)
 
-def get_connection() -> sqlite3.Connection:
+
+def attach(conn: sqlite3.Connection, path: str, schema: str) -> None:
+    """ATTACH the database at `path` (created if missing) as `schema`."""
+    if IN_MEMORY:
+        _keep_alive(path)
+    conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+
+
+def shard_for(key: str) -> int:
+    """Shard holding the order with this id (stable across processes)."""
+    if DATABASE_SHARDS == 1:
+        return 0
+    return zlib.crc32(key.encode("utf-8")) % DATABASE_SHARDS
+
+
+def group_by_shard(values: Iterable[T], key: Callable[[T], str] = str) -> Dict[int, List[T]]:
+    """Split values by the shard of key(value), keeping their order."""
+    groups: Dict[int, List[T]] = {}
+    for value in values:
+        groups.setdefault(shard_for(key(value)), []).append(value)
+    return groups
+
+
+def get_connection(shard: int = 0) -> sqlite3.Connection:
     """Create a new database connection."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect(shard_paths()[shard], factory=connection_factory())
     conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
     return conn
 
 
+def commit_generation() -> int:
+    """Return the current commit generation."""
+    with _commit_condition:
+        return _commit_generation
+
+
+def wait_for_commit(after_generation: int, timeout: float) -> bool:
+    """Block until a commit newer than `after_generation` happens or timeout.
+
+    Only commits made through get_db() in this process are signalled; callers
+    should re-check the database on timeout to pick up other writers.
+    """
+    with _commit_condition:
+        return _commit_condition.wait_for(
+            lambda: _commit_generation != after_generation, timeout
+        )
+
+
+def add_commit_listener(listener: Callable[[sqlite3.Connection], None]) -> None:
+    """Register a callback run after every commit made through get_db().
+
+    It runs in the writing thread before the request returns, so it must be
+    quick and must not raise; the write is already committed.
+    """
+    _commit_listeners.append(listener)
+
+
+def _notify_commit() -> None:
+    global _commit_generation
+    with _commit_condition:
+        _commit_generation += 1
+        _commit_condition.notify_all()
+
+
 @contextmanager
-def get_db() -> Generator[sqlite3.Connection, None, None]:
+def get_db(shard: int = 0) -> Generator[sqlite3.Connection, None, None]:
     """Context manager for database connections."""
-    conn = get_connection()
+    conn = get_connection(shard)
     try:
         yield conn
         conn.commit()
+        if conn.total_changes:
+            _notify_commit()
+            for listener in _commit_listeners:
+                listener(conn)
     except Exception:
         conn.rollback()
         raise
     finally:
         conn.close()
+
+
+def _run_on_shard(func: Callable[[int, sqlite3.Connection], T], shard: int) -> T:
+    with get_db(shard) as conn:
+        return func(shard, conn)
+
+
+def fan_out(
+    func: Callable[[int, sqlite3.Connection], T], shards: Optional[Iterable[int]] = None
+) -> Dict[int, T]:
+    """Run func(shard, conn) on each shard (default: all) in parallel.
+
+    Each shard gets its own connection and transaction, committed when func
+    returns; there is no atomicity across shards. Returns results by shard.
+    """
+    shards = list(range(DATABASE_SHARDS) if shards is None else shards)
+    if len(shards) == 1:
+        return {shards[0]: _run_on_shard(func, shards[0])}
+
+    global _fan_out_pool
+    with _fan_out_pool_lock:
+        if _fan_out_pool is None:
+            _fan_out_pool = ThreadPoolExecutor(
+                max_workers=max(4, DATABASE_SHARDS * 4), thread_name_prefix="db-shard"
+            )
+    # Each task runs in a copy of the caller's context (request profiling)
+    futures = {
+        shard: _fan_out_pool.submit(contextvars.copy_context().run, _run_on_shard, func, shard)
+        for shard in shards
+    }
+    return {shard: future.result() for shard, future in futures.items()}
@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+
+from fastapi import HTTPException
+
+# Seconds a client should wait before retrying after lock contention
+LOCKED_RETRY_AFTER_SECONDS = 1
+
+_lock_errors = 0
+_lock_errors_lock = threading.Lock()
+
+
+def is_lock_error(error: Exception) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED, e.g. "database is locked"."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def db_error(error: Exception) -> HTTPException:
+    """Map a database exception to the HTTP error a route should raise.
+
+    Lock contention is transient, so it becomes a retryable 503 with
+    Retry-After; anything else stays a 500.
+    """
+    global _lock_errors
+    if is_lock_error(error):
+        with _lock_errors_lock:
+            _lock_errors += 1
+        return HTTPException(
+            status_code=503,
+            detail="Database busy, retry later",
+            headers={"Retry-After": str(LOCKED_RETRY_AFTER_SECONDS)},
+        )
+    return HTTPException(status_code=500, detail=f"Database error: {str(error)}")
+
+
+def lock_error_count() -> int:
+    """Lock errors turned into 503s since startup."""
+    return _lock_errors
@@ -0,0 +1,423 @@
+"""Optional in-memory columnar copy of the live orders ("hot set").
+
+With ORDERS_HOT_SET=1 (and numpy installed) the non-deleted orders are
+loaded at startup into NumPy columns. GET /orders and GET /orders/stats
+then filter, sort, page and count with vectorized operations instead of
+querying SQLite. Status, payment status, customer fields and order_date
+are dictionary-encoded: each row stores an integer code into a shared
+list of distinct values.
+
+SQLite stays the source of truth. The hot set follows it through the
+order_changes log (migration 005): every commit made through get_db()
+applies the new log entries before the request returns (write-through),
+and readers compare the orders table version first, so writes from other
+processes are picked up too. If the log was trimmed past the last applied
+entry, the hot set reloads. On any error it unloads itself and the routes
+fall back to SQL. It covers unsharded storage only (DATABASE_SHARDS=1).
+"""
+
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from app.conditional import table_version
+from app.database import DATABASE_SHARDS, add_commit_listener, get_db
+
+HOT_SET_ENABLED = os.getenv("ORDERS_HOT_SET", "0") == "1"
+# Live rows are compacted when more than this share of slots is dead
+COMPACT_DEAD_RATIO = 0.25
+CHANGES_BATCH_SIZE = 1000
+LOAD_BATCH_SIZE = 10000
+INITIAL_CAPACITY = 1024
+
+COLUMNS = (
+    "id",
+    "order_number",
+    "customer_name",
+    "customer_email",
+    "customer_avatar",
+    "order_date",
+    "status",
+    "total_amount",
+    "payment_status",
+    "created_at",
+    "updated_at",
+)
+DICTIONARY_COLUMNS = (
+    "customer_name",
+    "customer_email",
+    "customer_avatar",
+    "order_date",
+    "status",
+    "payment_status",
+)
+# Stored as fixed-width UTF-8 bytes, widened when a longer value arrives
+BYTES_COLUMNS = ("id", "order_number", "created_at", "updated_at")
+
+_MONTH_PREFIX = re.compile(r"^(\d{4})-(\d{2})-")
+_EPOCH = datetime(1970, 1, 1)
+_NO_TIMESTAMP = -(2**62)
+
+
+def _month_key(order_date: Optional[str]) -> int:
+    """202410 for '2024-10-...', matching `order_date LIKE '2024-10-%'`; else -1."""
+    match = _MONTH_PREFIX.match(order_date or "")
+    return int(match.group(1)) * 100 + int(match.group(2)) if match else -1
+
+
+def _timestamp_key(value: Optional[str]) -> int:
+    """Sortable integer (microseconds) for a stored created_at; NULLs sort first."""
+    if not value:
+        return _NO_TIMESTAMP
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return _NO_TIMESTAMP
+    delta = dt.replace(tzinfo=None) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class _Dictionary:
+    """Distinct values of a column and their integer codes."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self.codes: Dict[Optional[str], int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.values)
+            + sys.getsizeof(self.codes)
+            + sum(sys.getsizeof(v) for v in self.values if v is not None)
+        )
+
+
+class OrdersHotSet:
+    def __init__(self, enabled: bool = HOT_SET_ENABLED):
+        self.enabled = enabled and np is not None and DATABASE_SHARDS == 1
+        self.loaded = False
+        self.load_count = 0
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.size = 0  # slots in use, live or dead
+        self.live_count = 0
+        self.seq = 0  # last order_changes entry applied
+        self.version: Optional[int] = None  # orders table version seen
+        self._positions: Dict[str, int] = {}
+        self._dicts = {name: _Dictionary() for name in DICTIONARY_COLUMNS}
+        self._month_of_date = np.zeros(0, dtype=np.int32) if np is not None else None
+        self._cols: Dict[str, "np.ndarray"] = {}
+        if np is None:
+            return
+        for name in BYTES_COLUMNS:
+            self._cols[name] = np.zeros(INITIAL_CAPACITY, dtype="S1")
+        for name in DICTIONARY_COLUMNS:
+            self._cols[name] = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._cols["total_amount"] = np.zeros(INITIAL_CAPACITY, dtype=np.float64)
+        self._cols["created_key"] = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self._cols["live"] = np.zeros(INITIAL_CAPACITY, dtype=bool)
+
+    # Loading and write-through
+
+    def load(self) -> None:
+        """(Re)load all live orders from SQLite."""
+        if not self.enabled:
+            if HOT_SET_ENABLED and np is None:
+                print("ORDERS_HOT_SET=1 but numpy is not installed; hot set disabled")
+            elif HOT_SET_ENABLED:
+                print("ORDERS_HOT_SET=1 is ignored with DATABASE_SHARDS > 1")
+            return
+        try:
+            with get_db() as conn:
+                self._load(conn)
+        except Exception as e:
+            self._unload(e)
+
+    def _load(self, conn) -> None:
+        with self._lock:
+            self._reset()
+            cursor = conn.cursor()
+            # One read transaction, so the log position matches the rows
+            cursor.execute("BEGIN")
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM order_changes")
+            self.seq = cursor.fetchone()[0]
+            self.version = table_version(conn, "orders")[0]
+            cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM orders WHERE deleted_at IS NULL")
+            while True:
+                rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                if not rows:
+                    break
+                self.append_rows(rows)
+            conn.commit()
+            self.loaded = True
+            self.load_count += 1
+
+    def _unload(self, error: Exception) -> None:
+        print(f"Orders hot set unloaded, falling back to SQLite: {error}")
+        with self._lock:
+            self.loaded = False
+            self._reset()
+
+    def on_commit(self, conn) -> None:
+        """Commit listener: apply the writes that were just committed."""
+        if self.loaded:
+            self.catch_up(conn)
+
+    def catch_up(self, conn, version: Optional[int] = None) -> bool:
+        """Apply new order_changes entries. True if the hot set can answer reads.
+
+        `version` is the orders table version the caller already read; when
+        it matches the last one seen there is nothing to apply.
+        """
+        if not self.loaded:
+            return False
+        try:
+            with self._lock:
+                if not self.loaded:
+                    return False
+                if version is None:
+                    version = table_version(conn, "orders")[0]
+                if version == self.version:
+                    return True
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT purged_through FROM _change_feed_state WHERE name = 'orders'"
+                )
+                state = cursor.fetchone()
+                if state is not None and state[0] > self.seq:
+                    self._load(conn)
+                    return True
+                self._apply_changes(cursor)
+                self.version = version
+                return True
+        except Exception as e:
+            self._unload(e)
+            return False
+
+    def _apply_changes(self, cursor) -> None:
+        columns = ", ".join(f"o.{column}" for column in COLUMNS)
+        while True:
+            cursor.execute(
+                f"""
+                SELECT c.seq, c.order_id, {columns}
+                FROM order_changes c
+                LEFT JOIN orders o ON o.id = c.order_id AND c.op = 'upsert' AND o.deleted_at IS NULL
+                WHERE c.seq > ?
+                ORDER BY c.seq
+                LIMIT ?
+                """,
+                (self.seq, CHANGES_BATCH_SIZE),
+            )
+            changes = cursor.fetchall()
+            for change in changes:
+                if change[2] is None:
+                    self.remove(change[1])
+                else:
+                    self.upsert(tuple(change)[2:])
+                self.seq = change[0]
+            if len(changes) < CHANGES_BATCH_SIZE:
+                break
+        if self.size - self.live_count > max(INITIAL_CAPACITY, self.size * COMPACT_DEAD_RATIO):
+            self._compact()
+
+    # Storage
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = len(self._cols["live"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._cols.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.size] = column[: self.size]
+            self._cols[name] = grown
+
+    def _fit_bytes(self, name: str, values: List[bytes]) -> None:
+        width = max((len(v) for v in values), default=0)
+        if width > self._cols[name].dtype.itemsize:
+            self._cols[name] = self._cols[name].astype(f"S{width}")
+
+    def _encode(self, name: str, value: Optional[str]) -> int:
+        code = self._dicts[name].encode(value)
+        if name == "order_date" and code == len(self._month_of_date):
+            self._month_of_date = np.append(self._month_of_date, np.int32(_month_key(value)))
+        return code
+
+    def append_rows(self, rows: Iterable[tuple]) -> None:
+        """Append rows (in COLUMNS order) for orders not yet in the hot set."""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            start = self.size
+            end = start + len(rows)
+            self._ensure_capacity(end)
+            by_column = list(zip(*rows))
+            for index, name in enumerate(COLUMNS):
+                values = by_column[index]
+                if name in BYTES_COLUMNS:
+                    encoded = [(v or "").encode("utf-8") for v in values]
+                    self._fit_bytes(name, encoded)
+                    self._cols[name][start:end] = encoded
+                elif name in DICTIONARY_COLUMNS:
+                    self._cols[name][start:end] = [self._encode(name, v) for v in values]
+                else:
+                    self._cols[name][start:end] = values
+            self._cols["created_key"][start:end] = [
+                _timestamp_key(v) for v in by_column[COLUMNS.index("created_at")]
+            ]
+            self._cols["live"][start:end] = True
+            for position, order_id in enumerate(by_column[0], start=start):
+                self._positions[order_id] = position
+            self.size = end
+            self.live_count += len(rows)
+
+    def upsert(self, row: tuple) -> None:
+        position = self._positions.get(row[0])
+        if position is None:
+            self.append_rows([row])
+            return
+        for name, value in zip(COLUMNS, row):
+            if name in BYTES_COLUMNS:
+                encoded = (value or "").encode("utf-8")
+                self._fit_bytes(name, [encoded])
+                self._cols[name][position] = encoded
+            elif name in DICTIONARY_COLUMNS:
+                self._cols[name][position] = self._encode(name, value)
+            else:
+                self._cols[name][position] = value
+        self._cols["created_key"][position] = _timestamp_key(row[COLUMNS.index("created_at")])
+
+    def remove(self, order_id: str) -> None:
+        position = self._positions.pop(order_id, None)
+        if position is not None:
+            self._cols["live"][position] = False
+            self.live_count -= 1
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._cols["live"][: self.size])
+        for name, column in self._cols.items():
+            compacted = np.zeros(len(column), dtype=column.dtype)
+            compacted[: len(keep)] = column[keep]
+            self._cols[name] = compacted
+        self.size = len(keep)
+        ids = self._cols["id"][: self.size]
+        self._positions = {order_id.decode("utf-8"): position for position, order_id in enumerate(ids)}
+
+    def _row(self, position: int) -> dict:
+        row = {}
+        for name in COLUMNS:
+            value = self._cols[name][position]
+            if name in BYTES_COLUMNS:
+                row[name] = value.decode("utf-8") or None
+            elif name in DICTIONARY_COLUMNS:
+                row[name] = self._dicts[name].values[value]
+            else:
+                row[name] = float(value)
+        return row
+
+    # Queries
+
+    def page(self, status: Optional[str], limit: int, offset: int) -> Tuple[int, List[dict]]:
+        """Live orders (optionally with one status), newest first, one page.
+
+        Ordered by created_at DESC, id DESC like the SQL query.
+        """
+        with self._lock:
+            mask = self._cols["live"][: self.size]
+            if status is not None:
+                code = self._dicts["status"].codes.get(status)
+                if code is None:
+                    return 0, []
+                mask = mask & (self._cols["status"][: self.size] == code)
+            positions = np.flatnonzero(mask)
+            total = len(positions)
+            needed = offset + limit
+            if offset >= total:
+                return total, []
+
+            keys = self._cols["created_key"][positions]
+            if needed < total:
+                # Only rows at or above the needed-th newest timestamp can be on the page
+                threshold = np.partition(keys, total - needed)[total - needed]
+                positions = positions[keys >= threshold]
+                keys = self._cols["created_key"][positions]
+            order = np.lexsort((self._cols["id"][positions], keys))[::-1]
+            return total, [self._row(p) for p in positions[order][offset:needed]]
+
+    def stats(self, year_month: str) -> Tuple[int, Dict[str, int]]:
+        """Live orders with an order_date in YYYY-MM, and live orders per status."""
+        with self._lock:
+            live = self._cols["live"][: self.size]
+            months = self._month_of_date[self._cols["order_date"][: self.size][live]]
+            in_month = int(np.count_nonzero(months == int(year_month.replace("-", ""))))
+            statuses = self._dicts["status"].values
+            counts = np.bincount(self._cols["status"][: self.size][live], minlength=len(statuses))
+            return in_month, {status: int(counts[code]) for code, status in enumerate(statuses)}
+
+    def stats_and_page(
+        self, year_month: str, status: Optional[str], limit: int
+    ) -> Tuple[int, Dict[str, int], int, List[dict]]:
+        """stats() and the first page() taken together, with no write in between."""
+        with self._lock:
+            total, rows = self.page(status, limit, 0)
+            return self.stats(year_month) + (total, rows)
+
+    # Reporting
+
+    def memory_report(self) -> dict:
+        with self._lock:
+            columns = {name: int(column.nbytes) for name, column in self._cols.items()}
+            dictionaries = {name: d.nbytes() for name, d in self._dicts.items()}
+            dictionaries["order_date_months"] = int(self._month_of_date.nbytes)
+            id_index = sys.getsizeof(self._positions) + sum(
+                sys.getsizeof(order_id) for order_id in self._positions
+            )
+            total = sum(columns.values()) + sum(dictionaries.values()) + id_index
+            per_order = total / self.live_count if self.live_count else 0.0
+            return {
+                "orders": self.live_count,
+                "slots": self.size,
+                "capacity": len(self._cols["live"]),
+                "columns_bytes": columns,
+                "dictionary_sizes": {name: len(d.values) for name, d in self._dicts.items()},
+                "dictionaries_bytes": dictionaries,
+                "id_index_bytes": id_index,
+                "total_bytes": total,
+                "bytes_per_order": round(per_order, 1),
+                "mib_per_million_orders": round(per_order * 1_000_000 / 2**20, 1),
+            }
+
+    def status(self) -> dict:
+        report = {
+            "enabled": self.enabled,
+            "loaded": self.loaded,
+            "load_count": self.load_count,
+            "seq": self.seq,
+            "version": self.version,
+        }
+        if self.loaded:
+            report["memory"] = self.memory_report()
+        return report
+
+
+hot_set = OrdersHotSet()
+add_commit_listener(hot_set.on_commit)
@@ -0,0 +1,43 @@
+"""Time-ordered UUIDs (version 7, RFC 9562) for new primary keys.
+
+A UUIDv7 starts with a 48-bit Unix millisecond timestamp, so ids created
+later sort later and inserts land at the right edge of the primary key
+index instead of at random pages. The string form is the usual 36
+character 8-4-4-4-12 hex, the same as the uuid4 ids already stored.
+
+Within a millisecond the 12-bit `rand_a` field is a counter (RFC 9562
+method 1), so ids from one process are strictly increasing.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            # Same millisecond, or the clock stepped back: keep counting
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFFFFFFFFFFFFFF
+    value = (ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """A new time-ordered id string."""
+    return str(uuid7())
@@ -0,0 +1,177 @@
+"""Streaming NDJSON / CSV ingestion shared by the /items and /orders import endpoints.
+
+The request body is parsed incrementally as it arrives. Valid records are
+flushed to the database in chunks through a sync `insert_chunk` callable run
+in the threadpool. Memory stays bounded by the chunk size and the longest
+line, whatever the upload size.
+"""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_LINE_LENGTH = 1024 * 1024
+MAX_REPORTED_ERRORS = 1000
+
+
+class RecordError(ValueError):
+    """A record that cannot be imported; the message goes into the error report."""
+
+
+async def iter_lines(request: Request) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Yield (line_number, line) from the request body without buffering it all.
+
+    Lines longer than MAX_LINE_LENGTH are dropped as they stream in and
+    yielded as None. A leading byte order mark is skipped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    # Pieces of the unfinished last line, joined once it ends, so a long line
+    # arriving in many chunks is not copied again for every chunk
+    pending: List[str] = []
+    pending_length = 0
+    line_number = 0
+    discarding = False
+
+    def feed(text: str) -> List[Tuple[int, Optional[str]]]:
+        """Complete lines in `text`; keeps the unfinished rest in `pending`."""
+        nonlocal pending_length, line_number, discarding
+        *lines, rest = text.split("\n")
+        complete = []
+        if lines:
+            first = None if discarding else "".join(pending) + lines[0]
+            pending.clear()
+            pending_length = 0
+            discarding = False
+            for line in [first] + lines[1:]:
+                line_number += 1
+                if line is None or len(line) > MAX_LINE_LENGTH:
+                    complete.append((line_number, None))
+                else:
+                    complete.append((line_number, line.rstrip("\r")))
+        if rest and not discarding:
+            pending.append(rest)
+            pending_length += len(rest)
+            if pending_length > MAX_LINE_LENGTH:
+                discarding = True
+                pending.clear()
+        return complete
+
+    async for chunk in request.stream():
+        for item in feed(decoder.decode(chunk)):
+            yield item
+    for item in feed(decoder.decode(b"", final=True)):
+        yield item
+    if discarding:
+        yield line_number + 1, None
+    elif pending:
+        last = "".join(pending)
+        if last.strip():
+            yield line_number + 1, last.rstrip("\r")
+
+
+async def iter_records(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (line_number, record) pairs; record is a dict or a RecordError.
+
+    CSV bodies (Content-Type text/csv) need a header line; quoted fields
+    must not contain newlines. Anything else is read as NDJSON.
+    """
+    content_type = request.headers.get("content-type", "")
+    header: Optional[List[str]] = None
+    is_csv = "csv" in content_type
+
+    async for line_number, line in iter_lines(request):
+        if line is None:
+            yield line_number, RecordError(f"Line exceeds {MAX_LINE_LENGTH} characters")
+            continue
+        if not line.strip():
+            continue
+        if is_csv:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, RecordError(
+                    f"Expected {len(header)} columns, got {len(values)}"
+                )
+                continue
+            yield line_number, dict(zip(header, values))
+        else:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, RecordError(f"Invalid JSON: {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                yield line_number, RecordError("Expected a JSON object")
+                continue
+            yield line_number, record
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def import_records(
+    request: Request,
+    to_row: Callable[[dict], tuple],
+    insert_chunk: Callable[[List[tuple]], int],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> dict:
+    """Stream records from the request, convert them with `to_row` and insert in chunks.
+
+    `to_row` validates one record (raising ValidationError or RecordError) and
+    returns the parameter tuple for the insert. Each chunk is committed on its
+    own, so rows from earlier chunks stay in place if a later line fails.
+    """
+    inserted = 0
+    error_count = 0
+    errors: List[dict] = []
+    chunk: List[tuple] = []
+
+    def report(line_number: int, message: str) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_number, "error": message})
+
+    try:
+        async for line_number, record in iter_records(request):
+            if isinstance(record, RecordError):
+                report(line_number, str(record))
+                continue
+            try:
+                chunk.append(to_row(record))
+            except ValidationError as e:
+                report(line_number, _format_validation_error(e))
+                continue
+            except RecordError as e:
+                report(line_number, str(e))
+                continue
+            if len(chunk) >= chunk_size:
+                inserted += await run_in_threadpool(insert_chunk, chunk)
+                chunk = []
+    except ClientDisconnect:
+        # Earlier chunks stay committed; the pending one is dropped
+        raise HTTPException(
+            status_code=400, detail=f"Upload aborted by the client after {inserted} rows"
+        )
+
+    if chunk:
+        inserted += await run_in_threadpool(insert_chunk, chunk)
+
+    return {
+        "inserted": inserted,
+        "error_count": error_count,
+        "errors": errors,
+        "errors_truncated": error_count > len(errors),
+    }
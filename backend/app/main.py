@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import health_router, items_router, orders_router
+from app.admission import AdmissionMiddleware, controller as admission_controller
+from app.hot_set import hot_set as orders_hot_set
+from app.maintenance import scheduler as maintenance_scheduler
+from app.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.routes import admin_router, health_router, items_router, orders_router
+from app.workload import RECORD_PATH as WORKLOAD_RECORD_PATH, TraceRecorder
 from migrate import run_migrations
 
 app = FastAPI(title="Backend Exercise API", version="1.0.0")
@@ -10,6 +15,20 @@ app = FastAPI(title="Backend Exercise API", version="1.0.0")
 app.include_router(health_router)
 app.include_router(items_router)
 app.include_router(orders_router)
+app.include_router(admin_router)
+
+# Request profiling; innermost so queueing for admission is not profiled
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Admission control; added before CORS so CORS stays the outer layer and
+# 503 rejections still carry CORS headers
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
+# Trace recording for workload.py; outside admission so arrival times are
+# recorded before any queueing
+if WORKLOAD_RECORD_PATH:
+    app.add_middleware(TraceRecorder, path=WORKLOAD_RECORD_PATH)
 
 # CORS for local frontend dev (Next.js on 3000)
 app.add_middleware(
@@ -32,6 +51,22 @@ def apply_migrations():
             print(f"Startup migration error: {e}")
 
 
+@app.on_event("startup")
+def load_orders_hot_set():
+    # After migrations, so the orders table and change log exist
+    orders_hot_set.load()
+
+
+@app.on_event("startup")
+def start_maintenance():
+    maintenance_scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_maintenance():
+    maintenance_scheduler.stop()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
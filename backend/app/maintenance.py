@@ -0,0 +1,265 @@
+"""In-process database maintenance scheduler.
+
+Runs ANALYZE / PRAGMA optimize, WAL checkpoints, integrity checks, the
+soft-delete purge and (when enabled) order archival and online backups on
+their own intervals from a daemon thread started at app startup. Due tasks
+are deferred while the database is taking writes, up to
+MAINTENANCE_MAX_DEFER_SECONDS, and every run is recorded for
+/admin/maintenance.
+Each task goes through the shards one at a time.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from app.archive import ARCHIVE_INTERVAL_SECONDS, archive_orders
+from app.backup import backup_database
+from app.database import DATABASE_SHARDS, get_db
+from app.purger import PURGE_INTERVAL_SECONDS, purge_deleted_orders
+
+TICK_SECONDS = float(os.getenv("MAINTENANCE_TICK_SECONDS", "5"))
+# Row changes per second above which due tasks wait for a quieter moment
+BUSY_WRITES_PER_SECOND = float(os.getenv("MAINTENANCE_BUSY_WRITES_PER_SECOND", "50"))
+MAX_DEFER_SECONDS = float(os.getenv("MAINTENANCE_MAX_DEFER_SECONDS", "900"))
+HISTORY_SIZE = 100
+
+# Rows sampled per index by ANALYZE; keeps it fast on large tables
+ANALYSIS_LIMIT = 1000
+
+
+def analyze(stop_event: threading.Event) -> dict:
+    stat1_rows = 0
+    for shard in range(DATABASE_SHARDS):
+        with get_db(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            cursor.fetchall()
+            cursor.execute("ANALYZE")
+            cursor.execute("SELECT COUNT(1) FROM sqlite_stat1")
+            stat1_rows += cursor.fetchone()[0]
+    return {"stat1_rows": stat1_rows}
+
+
+def optimize(stop_event: threading.Event) -> dict:
+    for shard in range(DATABASE_SHARDS):
+        with get_db(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA optimize")
+            cursor.fetchall()
+    return {"ok": True}
+
+
+def wal_checkpoint(stop_event: threading.Event) -> dict:
+    result = {"busy": False, "log_frames": 0, "checkpointed_frames": 0, "not_wal_shards": []}
+    for shard in range(DATABASE_SHARDS):
+        with get_db(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, log_frames, checkpointed_frames = cursor.fetchone()
+        # -1 frames: the shard is not in WAL mode (e.g. DATABASE_PATH=:memory:)
+        if log_frames < 0:
+            result["not_wal_shards"].append(shard)
+            continue
+        result["busy"] = result["busy"] or bool(busy)
+        result["log_frames"] += log_frames
+        result["checkpointed_frames"] += checkpointed_frames
+    return result
+
+
+def integrity_check(stop_event: threading.Event) -> dict:
+    messages = []
+    for shard in range(DATABASE_SHARDS):
+        with get_db(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA quick_check")
+            shard_messages = [row[0] for row in cursor.fetchall()]
+        if shard_messages != ["ok"]:
+            messages.extend(f"shard {shard}: {message}" for message in shard_messages)
+    ok = not messages
+    if not ok:
+        print(f"Integrity check failed: {messages}")
+    return {"ok": ok, "messages": messages[:20] or ["ok"]}
+
+
+def purge(stop_event: threading.Event) -> dict:
+    return purge_deleted_orders(stop_event=stop_event)
+
+
+def archive(stop_event: threading.Event) -> dict:
+    return archive_orders(stop_event=stop_event)
+
+
+def backup(stop_event: threading.Event) -> dict:
+    return backup_database(stop_event=stop_event)
+
+
+def total_row_changes() -> int:
+    """Sum of the per-table write counters kept by triggers (migration 003)."""
+    total = 0
+    for shard in range(DATABASE_SHARDS):
+        with get_db(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(SUM(version), 0) FROM _table_versions")
+            total += cursor.fetchone()[0]
+    return total
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class MaintenanceTask:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[threading.Event], dict],
+        interval: float,
+        initial_delay: Optional[float] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_due = time.monotonic() + (interval if initial_delay is None else initial_delay)
+        self.deferred_since: Optional[float] = None
+        self.last_run: Optional[dict] = None
+        self.run_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+
+class MaintenanceScheduler:
+    def __init__(self, tick: float = TICK_SECONDS):
+        self.tick = tick
+        self.tasks: Dict[str, MaintenanceTask] = {}
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._history_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_changes: Optional[int] = None
+        self._writes_per_second = 0.0
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[threading.Event], dict],
+        interval: float,
+        initial_delay: Optional[float] = None,
+    ) -> None:
+        self.tasks[name] = MaintenanceTask(name, func, interval, initial_delay)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def run_task(self, name: str, trigger: str = "manual") -> Optional[dict]:
+        """Run a task now. Returns None if it is already running."""
+        task = self.tasks[name]
+        if not task.lock.acquire(blocking=False):
+            return None
+        try:
+            started_at = _utc_now()
+            start = time.perf_counter()
+            record = {"task": name, "trigger": trigger, "started_at": started_at}
+            try:
+                record["result"] = task.func(self._stop)
+                record["ok"] = True
+            except Exception as e:
+                record["ok"] = False
+                record["error"] = str(e)
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            task.last_run = record
+            task.run_count += 1
+            with self._history_lock:
+                self.history.append(record)
+            return record
+        finally:
+            task.lock.release()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._history_lock:
+            history = list(self.history)
+        return {
+            "running": self._thread is not None,
+            "writes_per_second": round(self._writes_per_second, 2),
+            "busy_threshold": BUSY_WRITES_PER_SECOND,
+            "tasks": [
+                {
+                    "name": task.name,
+                    "enabled": task.enabled,
+                    "interval_seconds": task.interval,
+                    "next_due_in_seconds": round(task.next_due - now, 1) if task.enabled else None,
+                    "deferred_for_seconds": round(now - task.deferred_since, 1) if task.deferred_since else None,
+                    "run_count": task.run_count,
+                    "last_run": task.last_run,
+                }
+                for task in self.tasks.values()
+            ],
+            "history": history[::-1],
+        }
+
+    def _sample_write_rate(self) -> None:
+        try:
+            changes = total_row_changes()
+        except Exception:
+            return
+        if self._last_changes is not None:
+            self._writes_per_second = max(0, changes - self._last_changes) / self.tick
+        self._last_changes = changes
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick):
+            self._sample_write_rate()
+            busy = self._writes_per_second > BUSY_WRITES_PER_SECOND
+            now = time.monotonic()
+            for task in self.tasks.values():
+                if self._stop.is_set():
+                    break
+                if not task.enabled or now < task.next_due:
+                    continue
+                if busy:
+                    if task.deferred_since is None:
+                        task.deferred_since = now
+                    if now - task.deferred_since < MAX_DEFER_SECONDS:
+                        continue
+                self.run_task(task.name, trigger="deferred" if task.deferred_since else "scheduled")
+                task.deferred_since = None
+                task.next_due = time.monotonic() + task.interval
+
+
+def _interval(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+scheduler = MaintenanceScheduler()
+# ANALYZE once right after startup so the planner has statistics early
+scheduler.register(
+    "analyze", analyze, _interval("MAINTENANCE_ANALYZE_INTERVAL", "86400"), initial_delay=0
+)
+scheduler.register("optimize", optimize, _interval("MAINTENANCE_OPTIMIZE_INTERVAL", "3600"))
+scheduler.register(
+    "wal_checkpoint", wal_checkpoint, _interval("MAINTENANCE_CHECKPOINT_INTERVAL", "300")
+)
+scheduler.register(
+    "integrity_check", integrity_check, _interval("MAINTENANCE_INTEGRITY_INTERVAL", "86400")
+)
+scheduler.register("purge_deleted_orders", purge, PURGE_INTERVAL_SECONDS)
+# Off unless an interval is set
+scheduler.register("archive_orders", archive, ARCHIVE_INTERVAL_SECONDS)
+scheduler.register("backup", backup, _interval("MAINTENANCE_BACKUP_INTERVAL", "0"))
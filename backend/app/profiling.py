@@ -0,0 +1,417 @@
+"""On-demand profiling of single requests.
+
+With REQUEST_PROFILING=1 a request is profiled when it carries
+`X-Profile: 1` plus a valid X-Admin-Token (never when ADMIN_TOKEN is unset), or as
+every PROFILE_SAMPLE_EVERY-th request. A profile records:
+
+- time spent before the endpoint ran (body read, parsing, validation), in
+  the endpoint, in SQLite, serializing and sending the response
+- every SQL statement with its execute and fetch time, and commits
+- Python call stacks of the threads working on the request, sampled every
+  PROFILE_STACK_INTERVAL_MS
+
+Profiles are written as JSON files to PROFILE_DIR, keeping the newest
+PROFILE_MAX_FILES, and served by /admin/profiles. With REQUEST_PROFILING
+unset nothing is installed; when enabled, a request that is not profiled
+costs a header lookup and one context variable read per connection and
+endpoint call.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app.auth import is_admin_token
+
+PROFILING_ENABLED = os.getenv("REQUEST_PROFILING", "0") == "1"
+SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+MAX_PROFILE_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+STACK_INTERVAL_SECONDS = float(os.getenv("PROFILE_STACK_INTERVAL_MS", "1")) / 1000
+
+MAX_SQL_STATEMENTS = 500
+MAX_SQL_LENGTH = 2000
+MAX_STACKS = 200
+MAX_STACK_DEPTH = 64
+# Paths never profiled (viewing profiles should not create new ones)
+EXCLUDED_PREFIXES = ("/admin",)
+# Innermost frames of an event loop thread that is just waiting
+IDLE_LEAVES = {"select", "poll", "epoll"}
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, query: str, trigger: str):
+        self.id = f"{int(time.time() * 1000)}-{secrets.token_hex(4)}"
+        self.method = method
+        self.path = path
+        self.query = query
+        self.trigger = trigger
+        self.status: Optional[int] = None
+        self.created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        self.started = time.perf_counter()
+        self.endpoint_started: Optional[float] = None
+        self.endpoint_finished: Optional[float] = None
+        self.response_started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.statements: List[dict] = []
+        self.statements_dropped = 0
+        self.db_seconds = 0.0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._threads: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    # Threads working on the request are sampled while registered
+
+    def add_thread(self) -> None:
+        with self._lock:
+            self._threads[threading.get_ident()] += 1
+
+    def remove_thread(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    def start_sampler(self) -> None:
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._sampler.start()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(STACK_INTERVAL_SECONDS):
+            with self._lock:
+                idents = list(self._threads)
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None or frame.f_code.co_name in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    # SQL
+
+    def record_sql(self, sql: str, seconds: float) -> Optional[dict]:
+        with self._lock:
+            self.db_seconds += seconds
+            if len(self.statements) >= MAX_SQL_STATEMENTS:
+                self.statements_dropped += 1
+                return None
+            entry = {
+                "sql": " ".join(sql.split())[:MAX_SQL_LENGTH],
+                "execute_ms": _ms(seconds),
+                "fetch_ms": 0.0,
+                "at_ms": _ms(time.perf_counter() - self.started),
+            }
+            self.statements.append(entry)
+            return entry
+
+    def record_fetch(self, entry: Optional[dict], seconds: float) -> None:
+        with self._lock:
+            self.db_seconds += seconds
+            if entry is not None:
+                entry["fetch_ms"] = round(entry["fetch_ms"] + seconds * 1000, 3)
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def to_dict(self) -> dict:
+        endpoint_started = self.endpoint_started or self.response_started or self.finished
+        endpoint_finished = self.endpoint_finished or endpoint_started
+        response_started = self.response_started or self.finished
+        handler = endpoint_finished - endpoint_started
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "trigger": self.trigger,
+            "timings_ms": {
+                "total": _ms(self.finished - self.started),
+                # Body read, routing, dependency and request validation
+                "validation": _ms(endpoint_started - self.started),
+                "endpoint": _ms(handler),
+                # Summed over threads, so it can exceed `endpoint` for fan-out reads
+                "db": _ms(self.db_seconds),
+                "endpoint_python": _ms(max(0.0, handler - self.db_seconds)),
+                "serialization": _ms(response_started - endpoint_finished),
+                "send": _ms(self.finished - response_started),
+            },
+            "sql": self.statements,
+            "sql_dropped": self.statements_dropped,
+            "stack_interval_ms": _ms(STACK_INTERVAL_SECONDS),
+            "stack_samples": self.samples,
+            "stacks": [
+                {"stack": stack, "samples": count}
+                for stack, count in self.stacks.most_common(MAX_STACKS)
+            ],
+        }
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "total_ms": _ms(self.finished - self.started),
+        }
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    _entry: Optional[dict] = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._entry = self.connection.profile.record_sql(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._entry = self.connection.profile.record_sql(sql, time.perf_counter() - start)
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self.connection.profile.record_fetch(self._entry, time.perf_counter() - start)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection that records its statements in the active RequestProfile."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile = _current.get()
+        self.profile.add_thread()
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            if self.in_transaction is False:
+                self.profile.record_sql("COMMIT", time.perf_counter() - start)
+
+    def close(self):
+        self.profile.remove_thread()
+        super().close()
+
+
+def connection_factory() -> type:
+    """sqlite3.connect factory: profiled while a profiled request is running."""
+    return ProfiledConnection if _current.get() is not None else sqlite3.Connection
+
+
+def _profiled_endpoint(endpoint):
+    """Wrap an endpoint to timestamp its start and end in the active profile."""
+
+    if getattr(endpoint, "__profiled__", False):
+        # include_router() rebuilds routes from the already wrapped endpoint
+        return endpoint
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            profile.endpoint_started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.endpoint_finished = time.perf_counter()
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return endpoint(*args, **kwargs)
+            profile.endpoint_started = time.perf_counter()
+            # Sync endpoints run in a threadpool thread
+            profile.add_thread()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                profile.remove_thread()
+                profile.endpoint_finished = time.perf_counter()
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint reports its timing to the profiler."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if PROFILING_ENABLED:
+            endpoint = _profiled_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class ProfileStore:
+    """Profiles as JSON files in one directory, newest `max_files` kept."""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = MAX_PROFILE_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def save(self, profile: RequestProfile) -> None:
+        record = profile.to_dict()
+        record["summary"] = profile.summary()
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = self._path(profile.id) + ".tmp"
+            with open(temporary, "w") as f:
+                json.dump(record, f)
+            os.replace(temporary, self._path(profile.id))
+            for name in self._files()[: -self.max_files]:
+                os.remove(os.path.join(self.directory, name))
+
+    def list(self) -> List[dict]:
+        summaries = []
+        for name in reversed(self._files()):
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    summaries.append(json.load(f)["summary"])
+            except (OSError, ValueError, KeyError):
+                continue
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        if os.path.basename(profile_id) != profile_id:
+            return None
+        try:
+            with open(self._path(profile_id)) as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        record.pop("summary", None)
+        return record
+
+
+store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that runs selected requests under the profiler."""
+
+    def __init__(self, app, profile_store: ProfileStore = store, sample_every: int = SAMPLE_EVERY):
+        self.app = app
+        self.store = profile_store
+        self.sample_every = sample_every
+        self._requests = 0
+
+    def _trigger(self, scope) -> Optional[str]:
+        if scope["path"].startswith(EXCLUDED_PREFIXES):
+            return None
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") == b"1":
+            token = headers.get(b"x-admin-token")
+            if is_admin_token(token.decode("latin-1") if token is not None else None):
+                return "header"
+        if self.sample_every > 0:
+            self._requests += 1
+            if self._requests % self.sample_every == 0:
+                return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"), trigger
+        )
+
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                profile.response_started = time.perf_counter()
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = _current.set(profile)
+        profile.add_thread()
+        profile.start_sampler()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            profile.remove_thread()
+            _current.reset(token)
+            profile.finish()
+            await run_in_threadpool(self.store.save, profile)
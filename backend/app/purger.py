@@ -0,0 +1,85 @@
+"""Purge of soft-deleted orders.
+
+User-facing deletes only set orders.deleted_at. The purge removes the
+tombstoned rows in small batches, each in its own short write transaction,
+and then returns the freed pages to the OS with PRAGMA incremental_vacuum.
+It runs as a task of the maintenance scheduler (app/maintenance.py), one
+shard after the other.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from app.database import DATABASE_SHARDS, get_db
+
+PURGE_INTERVAL_SECONDS = float(os.getenv("ORDERS_PURGE_INTERVAL", "60"))
+PURGE_BATCH_SIZE = int(os.getenv("ORDERS_PURGE_BATCH_SIZE", "500"))
+# Pause between batches so queued writers can take the lock
+PURGE_BATCH_PAUSE_SECONDS = 0.05
+VACUUM_PAGES_PER_STEP = 256
+
+
+def purge_deleted_orders(
+    batch_size: int = PURGE_BATCH_SIZE,
+    pause: float = PURGE_BATCH_PAUSE_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+) -> dict:
+    """Purge every shard; see purge_shard."""
+    purged = 0
+    pages_freed = 0
+    for shard in range(DATABASE_SHARDS):
+        result = purge_shard(shard, batch_size, pause, stop_event)
+        purged += result["purged"]
+        pages_freed += result["pages_freed"]
+    return {"purged": purged, "pages_freed": pages_freed}
+
+
+def purge_shard(
+    shard: int,
+    batch_size: int = PURGE_BATCH_SIZE,
+    pause: float = PURGE_BATCH_PAUSE_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+) -> dict:
+    """Delete tombstoned orders batch by batch, then incrementally vacuum."""
+    purged = 0
+    while stop_event is None or not stop_event.is_set():
+        with get_db(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                DELETE FROM orders WHERE rowid IN (
+                    SELECT rowid FROM orders WHERE deleted_at IS NOT NULL LIMIT ?
+                )
+                """,
+                (batch_size,),
+            )
+            deleted = cursor.rowcount
+        purged += deleted
+        if deleted < batch_size:
+            break
+        time.sleep(pause)
+
+    pages_freed = 0
+    while stop_event is None or not stop_event.is_set():
+        with get_db(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] != 2:  # 2 = INCREMENTAL
+                break
+            cursor.execute("PRAGMA freelist_count")
+            free_pages = cursor.fetchone()[0]
+            if not free_pages:
+                break
+            cursor.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})")
+            cursor.fetchall()
+            cursor.execute("PRAGMA freelist_count")
+            freed = free_pages - cursor.fetchone()[0]
+        if freed <= 0:
+            break
+        pages_freed += freed
+        time.sleep(pause)
+
+    return {"purged": purged, "pages_freed": pages_freed}
+
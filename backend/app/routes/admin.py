@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.admission import controller as admission_controller
+from app.auth import require_admin
+from app.hot_set import hot_set
+from app.maintenance import scheduler
+from app.profiling import store as profile_store
+from app.singleflight import groups as singleflight_groups
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/maintenance")
+def maintenance_status():
+    """Maintenance tasks, their schedule and recent runs (newest first)."""
+    return scheduler.status()
+
+
+@router.post("/maintenance/{task}/run")
+def run_maintenance_task(task: str):
+    """Run a maintenance task immediately."""
+    if task not in scheduler.tasks:
+        raise HTTPException(status_code=404, detail="Unknown maintenance task")
+    record = scheduler.run_task(task)
+    if record is None:
+        raise HTTPException(status_code=409, detail="Task is already running")
+    return record
+
+
+@router.get("/admission")
+def admission_status():
+    """Per route class concurrency, queue depth and rejection counters."""
+    return admission_controller.stats()
+
+
+@router.get("/coalescing")
+def coalescing_status():
+    """Executions and coalesced requests per single-flight group."""
+    return {name: group.stats() for name, group in singleflight_groups.items()}
+
+
+@router.get("/hot-set")
+def hot_set_status():
+    """Orders hot set state and its memory footprint."""
+    return hot_set.status()
+
+
+@router.post("/hot-set/reload")
+def reload_hot_set():
+    """Reload the orders hot set from SQLite."""
+    if not hot_set.enabled:
+        raise HTTPException(status_code=409, detail="Orders hot set is not enabled")
+    hot_set.load()
+    return hot_set.status()
+
+
+@router.get("/profiles")
+def list_profiles():
+    """Stored request profiles, newest first."""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """A stored request profile: timings, SQL statements and sampled stacks."""
+    record = profile_store.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return record
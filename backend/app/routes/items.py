@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 
+from app.columnar import VARY, columnar_response, negotiate
+from app.conditional import make_etag, not_modified, table_version, to_http_date, validator_headers
 from app.database import get_db
+from app.errors import db_error
+from app.ingest import import_records
+from app.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(prefix="/items", tags=["items"], route_class=ProfiledRoute)
 
 
 class ItemCreate(BaseModel):
@@ -20,20 +25,60 @@ class ItemResponse(BaseModel):
 
 
 @router.get("")
-def list_items():
+def list_items(request: Request, response: Response):
     """
     List all items from the database.
     Uses raw SQL query (no ORM).
+    Answers 304 from the items table version when the client copy is current.
+    Also available in the columnar format (app/columnar.py).
     """
+    fmt = negotiate(request)
     try:
         with get_db() as conn:
+            version, modified_at = table_version(conn, "items")
+            etag = make_etag("items", version, fmt)
+            last_modified = to_http_date(modified_at)
+            cached = not_modified(request, etag, last_modified, vary=VARY)
+            if cached is not None:
+                return cached
+
             cursor = conn.cursor()
             cursor.execute("SELECT id, name FROM items ORDER BY id")
             rows = cursor.fetchall()
             items = [{"id": row["id"], "name": row["name"]} for row in rows]
+            headers = validator_headers(etag, last_modified)
+            if fmt is not None:
+                return columnar_response({"items": items}, "items", fmt, ["id", "name"], headers)
+            response.headers.update({**headers, "Vary": VARY})
             return {"items": items}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
+
+
+def item_import_row(record: dict) -> tuple:
+    return (ItemCreate(**record).name,)
+
+
+def insert_items(rows: list) -> int:
+    with get_db() as conn:
+        conn.executemany("INSERT INTO items (name) VALUES (?)", rows)
+    return len(rows)
+
+
+@router.post("/import")
+async def import_items(request: Request):
+    """
+    Bulk-create items from a streamed NDJSON body (one {"name": ...} per line)
+    or a CSV body with a `name` header (Content-Type: text/csv).
+    Rows are validated with ItemCreate and inserted in chunks; invalid lines
+    are skipped and listed in the error report.
+    """
+    try:
+        return await import_records(request, item_import_row, insert_items)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise db_error(e)
 
 
 @router.get("/{item_id}")
@@ -53,7 +98,7 @@ def get_item(item_id: int):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.post("", status_code=201)
@@ -65,11 +110,11 @@ def create_item(item: ItemCreate):
     try:
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("INSERT INTO items (name) VALUES (?)", (item.name,))
-            item_id = cursor.lastrowid
-            return {"id": item_id, "name": item.name}
+            cursor.execute("INSERT INTO items (name) VALUES (?) RETURNING id, name", (item.name,))
+            row = cursor.fetchone()
+            return {"id": row["id"], "name": row["name"]}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.put("/{item_id}")
@@ -81,17 +126,18 @@ def update_item(item_id: int, item: ItemUpdate):
     try:
         with get_db() as conn:
             cursor = conn.cursor()
-            # Check if item exists
-            cursor.execute("SELECT id FROM items WHERE id = ?", (item_id,))
-            if cursor.fetchone() is None:
+            # Update the item; no returned row means it does not exist
+            cursor.execute(
+                "UPDATE items SET name = ? WHERE id = ? RETURNING id, name", (item.name, item_id)
+            )
+            row = cursor.fetchone()
+            if row is None:
                 raise HTTPException(status_code=404, detail="Item not found")
-            # Update the item
-            cursor.execute("UPDATE items SET name = ? WHERE id = ?", (item.name, item_id))
-            return {"id": item_id, "name": item.name}
+            return {"id": row["id"], "name": row["name"]}
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.delete("/{item_id}", status_code=204)
@@ -103,14 +149,12 @@ def delete_item(item_id: int):
     try:
         with get_db() as conn:
             cursor = conn.cursor()
-            # Check if item exists
-            cursor.execute("SELECT id FROM items WHERE id = ?", (item_id,))
+            # Delete the item; no returned row means it does not exist
+            cursor.execute("DELETE FROM items WHERE id = ? RETURNING id", (item_id,))
             if cursor.fetchone() is None:
                 raise HTTPException(status_code=404, detail="Item not found")
-            # Delete the item
-            cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
             return None
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
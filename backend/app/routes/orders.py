@@ -1,17 +1,52 @@
-from typing import Optional, List
-
-from fastapi import APIRouter, HTTPException, Query
+import heapq
+import itertools
+import json
+import os
+import time
+from typing import Optional, List, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 
-from app.database import get_db
-
-
-router = APIRouter(prefix="/orders", tags=["orders"])
+from app.archive import attach_archive
+from app.columnar import VARY, columnar_response, negotiate
+from app.conditional import (
+    is_conditional,
+    make_etag,
+    not_modified,
+    table_version,
+    to_http_date,
+    validator_headers,
+)
+from app.database import (
+    DATABASE_SHARDS,
+    NOW_SQL,
+    commit_generation,
+    fan_out,
+    get_db,
+    group_by_shard,
+    shard_for,
+    utc_now,
+    wait_for_commit,
+)
+from app.errors import db_error
+from app.hot_set import hot_set
+from app.ids import new_id
+from app.ingest import RecordError, import_records
+from app.profiling import ProfiledRoute
+from app.singleflight import SingleFlight
+
+
+router = APIRouter(prefix="/orders", tags=["orders"], route_class=ProfiledRoute)
 
 
 ALLOWED_STATUSES = {"pending", "completed", "refunded"}
 ALLOWED_PAYMENT = {"paid", "unpaid"}
 
+# Tombstone mode: deletes only set deleted_at and the purger removes the rows
+# later in small batches (see app/purger.py).
+SOFT_DELETE = os.getenv("ORDERS_SOFT_DELETE", "1") == "1"
+
 
 class CustomerModel(BaseModel):
     name: str
@@ -40,6 +75,25 @@ class BulkStatusUpdate(BaseModel):
     status: str
 
 
+class OrderPatch(BaseModel):
+    status: Optional[str] = None
+    payment_status: Optional[str] = None
+    total_amount: Optional[float] = Field(None, gt=0)
+    order_date: Optional[str] = None
+
+
+class OrderPatchItem(OrderPatch):
+    id: str
+
+
+class BulkPatch(BaseModel):
+    """Either one `patch` for all `order_ids`, or per-order `patches`."""
+
+    order_ids: Optional[List[str]] = None
+    patch: Optional[OrderPatch] = None
+    patches: Optional[List[OrderPatchItem]] = None
+
+
 class BulkDuplicate(BaseModel):
     order_ids: List[str]
 
@@ -48,80 +102,349 @@ class BulkDelete(BaseModel):
     order_ids: List[str]
 
 
-def row_to_order(row) -> dict:
-    return {
-        "id": row["id"],
-        "order_number": row["order_number"],
-        "customer": {
-            "name": row["customer_name"],
-            "email": row["customer_email"],
-            "avatar": row["customer_avatar"],
-        },
-        "order_date": row["order_date"],
-        "status": row["status"],
-        "total_amount": row["total_amount"],
-        "payment_status": row["payment_status"],
-        "created_at": row["created_at"],
-        "updated_at": row["updated_at"],
-    }
-
-
-def next_order_number(conn) -> str:
+class BatchGet(BaseModel):
+    order_ids: List[str]
+
+
+# Response field -> backing columns, in response order
+ORDER_FIELDS = {
+    "id": ("id",),
+    "order_number": ("order_number",),
+    "customer": ("customer_name", "customer_email", "customer_avatar"),
+    "order_date": ("order_date",),
+    "status": ("status",),
+    "total_amount": ("total_amount",),
+    "payment_status": ("payment_status",),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+}
+ORDER_COLUMNS = [column for columns in ORDER_FIELDS.values() for column in columns]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma separated `fields=` projection; None means all fields."""
+    if fields is None:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    if not requested:
+        return None
+    unknown = requested - ORDER_FIELDS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return [name for name in ORDER_FIELDS if name in requested]
+
+
+def select_columns(fields: Optional[List[str]] = None, extra: tuple = ()) -> str:
+    """SQL column list for a projection, plus any columns the handler needs itself."""
+    if fields is None:
+        columns = list(ORDER_COLUMNS)
+    else:
+        columns = [column for name in fields for column in ORDER_FIELDS[name]]
+    columns.extend(column for column in extra if column not in columns)
+    return ", ".join(columns)
+
+
+def row_to_order(row, fields: Optional[List[str]] = None) -> dict:
+    if fields is None:
+        return {
+            "id": row["id"],
+            "order_number": row["order_number"],
+            "customer": {
+                "name": row["customer_name"],
+                "email": row["customer_email"],
+                "avatar": row["customer_avatar"],
+            },
+            "order_date": row["order_date"],
+            "status": row["status"],
+            # RETURNING hands back integral REAL values as int
+            "total_amount": float(row["total_amount"]),
+            "payment_status": row["payment_status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    order = {}
+    for name in fields:
+        if name == "customer":
+            order["customer"] = {
+                "name": row["customer_name"],
+                "email": row["customer_email"],
+                "avatar": row["customer_avatar"],
+            }
+        elif name == "total_amount":
+            order[name] = float(row[name])
+        else:
+            order[name] = row[name]
+    return order
+
+
+def order_column_names(fields: Optional[List[str]] = None) -> List[str]:
+    """Columns of row_to_order() records in the columnar format (app/columnar.py)."""
+    names = []
+    for name in fields or ORDER_FIELDS:
+        if name == "customer":
+            names.extend(("customer.name", "customer.email", "customer.avatar"))
+        else:
+            names.append(name)
+    return names
+
+
+PATCHABLE_FIELDS = ("status", "payment_status", "total_amount", "order_date")
+
+
+def validate_patch(patch: dict) -> None:
+    if "status" in patch and patch["status"] not in ALLOWED_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    if "payment_status" in patch and patch["payment_status"] not in ALLOWED_PAYMENT:
+        raise HTTPException(status_code=400, detail="Invalid payment_status")
+
+
+def apply_order_patches(
+    conn, patches: List[dict], projection: Optional[List[str]] = None
+) -> dict:
+    """Apply per-order patches in one set-based UPDATE ... FROM json_each(...).
+
+    Each patch is a dict with an `id` and any of PATCHABLE_FIELDS; absent
+    fields keep their value. Returns the updated rows keyed by id.
+    """
+    columns = ",\n".join(
+        f"json_extract(value, '$.{name}') AS {name}" for name in ("id",) + PATCHABLE_FIELDS
+    )
+    assignments = ",\n".join(
+        f"{name} = COALESCE(p.{name}, orders.{name})" for name in PATCHABLE_FIELDS
+    )
     cursor = conn.cursor()
-    cursor.execute("SELECT MAX(CAST(SUBSTR(order_number, 5) AS INTEGER)) FROM orders")
-    result = cursor.fetchone()[0]
-    next_num = (result or 1000) + 1
-    return f"#ORD{next_num}"
+    cursor.execute(
+        f"""
+        UPDATE orders SET
+            {assignments},
+            updated_at = {NOW_SQL}
+        FROM (SELECT {columns} FROM json_each(?)) AS p
+        WHERE orders.id = p.id AND orders.deleted_at IS NULL
+        RETURNING {select_columns(projection, extra=('id',))}
+        """,
+        (json.dumps(patches),),
+    )
+    return {row["id"]: row for row in cursor.fetchall()}
+
+
+# Highest numeric suffix of "#ORDnnnn" order numbers ever stored in the shard,
+# 1000 for an empty one: the MAX over orders or the high-water mark of
+# migration 011, which still counts purged and archived orders. Inlined into
+# INSERT ... SELECT so numbering happens in the same statement.
+LAST_ORDER_NUMBER_SQL = (
+    "SELECT MAX("
+    "(SELECT COALESCE(MAX(CAST(SUBSTR(order_number, 5) AS INTEGER)), 1000) FROM orders), "
+    "COALESCE((SELECT last FROM _order_number_state WHERE name = 'orders'), 1000))"
+)
+
+_order_number_floor: Optional[int] = None
+
+
+def order_number_floor() -> int:
+    """Highest order number on any shard when this process first needed one.
+
+    Shard i only holds numbers n with order_number_shard(n) == i (the API,
+    seed and workload tools all number that way), so its own MAX is enough
+    to number uniquely across shards without any coordination. The floor
+    keeps new numbers above those written before sharding or moved by
+    reshard_orders.py, which follow no such rule; both happen before the
+    API starts.
+    """
+    global _order_number_floor
+    if _order_number_floor is None:
+        if DATABASE_SHARDS == 1:
+            _order_number_floor = 0
+        else:
+            lasts = fan_out(lambda shard, conn: conn.execute(LAST_ORDER_NUMBER_SQL).fetchone()[0])
+            _order_number_floor = max(lasts.values())
+    return _order_number_floor
+
+
+def order_number_shard(number: int) -> int:
+    """Shard that stores the order numbered `number`."""
+    return number % DATABASE_SHARDS
+
+
+def first_order_number_sql(shard: int) -> str:
+    """SELECT for the next free order number on a shard; the last one + 1 unsharded.
+
+    Further numbers in the same insert follow every DATABASE_SHARDS.
+    """
+    n = DATABASE_SHARDS
+    return (
+        f"SELECT last + 1 + (({shard} - last - 1) % {n} + {n}) % {n} "
+        f"FROM (SELECT MAX(({LAST_ORDER_NUMBER_SQL}), {order_number_floor()}) AS last)"
+    )
+
+
+def new_order_id(shard: Optional[int] = None) -> str:
+    """A fresh time-ordered order id; with `shard`, one stored on that shard."""
+    while True:
+        order_id = new_id()
+        if shard is None or shard_for(order_id) == shard:
+            return order_id
+
+
+def on_all_shards(conn, func) -> List:
+    """Run func(shard, conn) on every shard, reusing `conn` when unsharded."""
+    if DATABASE_SHARDS == 1:
+        return [func(0, conn)]
+    return list(fan_out(func).values())
+
+
+def orders_version(conn) -> Tuple:
+    """(version, updated_at) of the orders table over all shards.
+
+    Sharded, the version is the tuple of shard versions and updated_at the
+    latest shard's.
+    """
+    versions = on_all_shards(conn, lambda shard, shard_conn: table_version(shard_conn, "orders"))
+    if len(versions) == 1:
+        return versions[0]
+    modified = [updated_at for _, updated_at in versions if updated_at]
+    return tuple(version for version, _ in versions), max(modified, default=None)
+
+
+def merge_newest_first(pages: List[List], offset: int, limit: int) -> List:
+    """k-way merge of per-source rows sorted by (created_at, id) DESC, then one page.
+
+    Each source (shard or archive) returned its first offset + limit rows.
+    """
+    merged = heapq.merge(
+        *pages, key=lambda row: (row["created_at"] or "", row["id"]), reverse=True
+    )
+    return list(itertools.islice(merged, offset, offset + limit))
+
+
+def patch_orders(patches: List[dict], projection: Optional[List[str]] = None) -> dict:
+    """apply_order_patches on each shard holding some of the orders."""
+    by_shard = group_by_shard(patches, key=lambda patch: patch["id"])
+    updated = {}
+    results = fan_out(
+        lambda shard, conn: apply_order_patches(conn, by_shard[shard], projection), by_shard
+    )
+    for rows in results.values():
+        updated.update(rows)
+    return updated
+
+# Identical concurrent list / stats / dashboard requests share one query
+list_reads = SingleFlight("orders.list")
+stats_reads = SingleFlight("orders.stats")
+dashboard_reads = SingleFlight("orders.dashboard")
+
+INSERT_ORDER_COLUMNS = """
+    id, order_number, customer_name, customer_email, customer_avatar,
+    order_date, status, total_amount, payment_status,
+    created_at, updated_at
+"""
 
 
 @router.get("")
 def list_orders(
+    request: Request,
+    response: Response,
     status: str = Query("all"),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
 ):
+    projection = parse_fields(fields)
+    fmt = negotiate(request)
     try:
         with get_db() as conn:
-            cursor = conn.cursor()
-
             params: List = []
-            where = ""
+            where = "WHERE deleted_at IS NULL"
             if status != "all":
                 if status not in ALLOWED_STATUSES:
                     raise HTTPException(status_code=400, detail="Invalid status filter")
-                where = "WHERE status = ?"
+                where += " AND status = ?"
                 params.append(status)
 
-            cursor.execute(f"SELECT COUNT(1) FROM orders {where}", params)
-            total = cursor.fetchone()[0]
-
-            offset = (page - 1) * limit
-            cursor.execute(
-                f"""
-                SELECT id, order_number, customer_name, customer_email, customer_avatar,
-                       order_date, status, total_amount, payment_status, created_at, updated_at
-                FROM orders
-                {where}
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-                """,
-                params + [limit, offset],
+            # The version is read before the rows, so a concurrent write can
+            # only make the ETag older than the body, never newer.
+            version, modified_at = orders_version(conn)
+            etag = make_etag(
+                "orders", version, status, page, limit, projection, include_archived, fmt
             )
-            rows = cursor.fetchall()
-            orders = [row_to_order(row) for row in rows]
-
-            total_pages = (total + limit - 1) // limit if limit else 1
-            return {
-                "orders": orders,
-                "total": total,
-                "page": page,
-                "limit": limit,
-                "total_pages": total_pages,
-            }
+            last_modified = to_http_date(modified_at)
+            cached = not_modified(request, etag, last_modified, vary=VARY)
+            if cached is not None:
+                return cached
+
+            def fetch_page() -> dict:
+                offset = (page - 1) * limit
+                if not include_archived and hot_set.catch_up(conn, version):
+                    total, rows = hot_set.page(
+                        None if status == "all" else status, limit, offset
+                    )
+                else:
+                    # Pages from several shards or archives are merged on (created_at, id)
+                    merged = DATABASE_SHARDS > 1 or include_archived
+                    columns = select_columns(
+                        projection, extra=("id", "created_at") if merged else ()
+                    )
+
+                    def shard_page(shard: int, shard_conn) -> List[tuple]:
+                        tables = ["orders"]
+                        if include_archived and attach_archive(shard_conn, shard):
+                            tables.append("archive.orders")
+                        shard_cursor = shard_conn.cursor()
+                        results = []
+                        for table in tables:
+                            shard_cursor.execute(f"SELECT COUNT(1) FROM {table} {where}", params)
+                            table_total = shard_cursor.fetchone()[0]
+
+                            # id breaks created_at ties, as in the index (and the hot set)
+                            shard_cursor.execute(
+                                f"""
+                                SELECT {columns}
+                                FROM {table}
+                                {where}
+                                ORDER BY created_at DESC, id DESC
+                                LIMIT ? OFFSET ?
+                                """,
+                                params + ([offset + limit, 0] if merged else [limit, offset]),
+                            )
+                            results.append((table_total, shard_cursor.fetchall()))
+                        return results
+
+                    results = [
+                        result
+                        for shard_results in on_all_shards(conn, shard_page)
+                        for result in shard_results
+                    ]
+                    total = sum(table_total for table_total, _ in results)
+                    pages = [rows for _, rows in results]
+                    rows = merge_newest_first(pages, offset, limit) if merged else pages[0]
+                orders = [row_to_order(row, projection) for row in rows]
+
+                total_pages = (total + limit - 1) // limit if limit else 1
+                return {
+                    "orders": orders,
+                    "total": total,
+                    "page": page,
+                    "limit": limit,
+                    "total_pages": total_pages,
+                }
+
+            # The ETag covers the version and every query parameter, so it
+            # doubles as the coalescing key
+            body = list_reads.do(etag, fetch_page)
+            headers = validator_headers(etag, last_modified)
+            if fmt is not None:
+                return columnar_response(
+                    body, "orders", fmt, order_column_names(projection), headers
+                )
+            response.headers.update({**headers, "Vary": VARY})
+            return body
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.put("/bulk/status")
@@ -132,30 +455,63 @@ def bulk_update_status(payload: BulkStatusUpdate):
         raise HTTPException(status_code=400, detail="order_ids required")
 
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(payload.order_ids))
+        # Ids that do not exist simply match no row
+        order_ids = list(dict.fromkeys(payload.order_ids))
+        updated = patch_orders(
+            [{"id": oid, "status": payload.status} for oid in order_ids],
+            projection=["id", "status"],
+        )
+        orders = [
+            row_to_order(updated[oid], ["id", "status"]) for oid in order_ids if oid in updated
+        ]
+        return {"updated_count": len(orders), "orders": orders}
+    except Exception as e:
+        raise db_error(e)
 
-            # Only update those that exist
-            cursor.execute(
-                f"SELECT id FROM orders WHERE id IN ({placeholders})",
-                payload.order_ids,
-            )
-            existing_ids = [row[0] for row in cursor.fetchall()]
-            if not existing_ids:
-                return {"updated_count": 0, "orders": []}
 
-            placeholders = ",".join(["?"] * len(existing_ids))
-            cursor.execute(
-                f"UPDATE orders SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})",
-                [payload.status] + existing_ids,
+@router.patch("/bulk")
+def bulk_patch(payload: BulkPatch, fields: Optional[str] = Query(None)):
+    """Patch many orders in one statement.
+
+    Send `order_ids` + `patch` to apply the same change everywhere, or
+    `patches` (each with its own `id`) for per-order changes. Updated orders
+    are returned in request order; ids that do not exist are in missing_ids.
+    """
+    projection = parse_fields(fields)
+    if payload.patches is not None:
+        if payload.order_ids is not None or payload.patch is not None:
+            raise HTTPException(
+                status_code=400, detail="Send either patches or order_ids with patch"
             )
+        patches = [item.model_dump(exclude_none=True) for item in payload.patches]
+        order_ids = [patch["id"] for patch in patches]
+        if len(set(order_ids)) != len(order_ids):
+            raise HTTPException(status_code=400, detail="Duplicate ids in patches")
+    else:
+        if payload.order_ids is None or payload.patch is None:
+            raise HTTPException(status_code=400, detail="order_ids and patch required")
+        common = payload.patch.model_dump(exclude_none=True)
+        order_ids = list(dict.fromkeys(payload.order_ids))
+        patches = [{"id": oid, **common} for oid in order_ids]
+
+    if not patches:
+        raise HTTPException(status_code=400, detail="order_ids required")
+    for patch in patches:
+        if len(patch) == 1:
+            raise HTTPException(status_code=400, detail="No fields to update")
+        validate_patch(patch)
 
-            updated_count = cursor.rowcount if cursor.rowcount is not None else len(existing_ids)
-            orders = [{"id": oid, "status": payload.status} for oid in existing_ids]
-            return {"updated_count": updated_count, "orders": orders}
+    try:
+        updated = patch_orders(patches, projection)
+        return {
+            "updated_count": len(updated),
+            "orders": [
+                row_to_order(updated[oid], projection) for oid in order_ids if oid in updated
+            ],
+            "missing_ids": [oid for oid in order_ids if oid not in updated],
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.post("/bulk/duplicate", status_code=201)
@@ -164,63 +520,57 @@ def bulk_duplicate(payload: BulkDuplicate):
         raise HTTPException(status_code=400, detail="order_ids required")
 
     try:
-        import uuid
-        from datetime import datetime
-
-        with get_db() as conn:
+        # Pair each original with its new id up front, so copies and their
+        # order numbers are produced by one INSERT ... SELECT in request order.
+        # Copies go to the shard of their original.
+        id_pairs = [
+            [oid, new_order_id(shard_for(oid))] for oid in dict.fromkeys(payload.order_ids)
+        ]
+        now_iso = utc_now()
+        pairs_by_shard = group_by_shard(id_pairs, key=lambda pair: pair[0])
+
+        def duplicate_on_shard(shard: int, conn) -> dict:
             cursor = conn.cursor()
-
-            placeholders = ",".join(["?"] * len(payload.order_ids))
             cursor.execute(
                 f"""
-                SELECT id, order_number, customer_name, customer_email, customer_avatar,
-                       order_date, status, total_amount, payment_status
-                FROM orders WHERE id IN ({placeholders})
+                INSERT INTO orders ({INSERT_ORDER_COLUMNS})
+                SELECT src.new_id,
+                       '#ORD' || (({first_order_number_sql(shard)}) + (src.position - 1) * {DATABASE_SHARDS}),
+                       src.customer_name, src.customer_email, src.customer_avatar,
+                       src.order_date, src.status, src.total_amount, src.payment_status,
+                       ?, ?
+                FROM (
+                    SELECT json_extract(p.value, '$[1]') AS new_id,
+                           ROW_NUMBER() OVER (ORDER BY p.key) AS position,
+                           o.customer_name, o.customer_email, o.customer_avatar,
+                           o.order_date, o.status, o.total_amount, o.payment_status
+                    FROM json_each(?) AS p
+                    JOIN orders o ON o.id = json_extract(p.value, '$[0]')
+                    WHERE o.deleted_at IS NULL
+                ) AS src
+                ORDER BY src.position
+                RETURNING id, order_number
                 """,
-                payload.order_ids,
+                (now_iso, now_iso, json.dumps(pairs_by_shard[shard])),
             )
-            originals = cursor.fetchall()
-
-            new_orders = []
-            for row in originals:
-                new_id = str(uuid.uuid4())
-                new_order_number = next_order_number(conn)
-                now_iso = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+            return {row["id"]: row["order_number"] for row in cursor.fetchall()}
 
-                cursor.execute(
-                    """
-                    INSERT INTO orders (
-                        id, order_number, customer_name, customer_email, customer_avatar,
-                        order_date, status, total_amount, payment_status,
-                        created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        new_id,
-                        new_order_number,
-                        row["customer_name"],
-                        row["customer_email"],
-                        row["customer_avatar"],
-                        row["order_date"],
-                        row["status"],
-                        row["total_amount"],
-                        row["payment_status"],
-                        now_iso,
-                        now_iso,
-                    ),
-                )
-
-                new_orders.append(
-                    {
-                        "id": new_id,
-                        "order_number": new_order_number,
-                        "original_order_id": row["id"],
-                    }
-                )
+        created = {}
+        for shard_created in fan_out(duplicate_on_shard, pairs_by_shard).values():
+            created.update(shard_created)
 
-            return {"duplicated_count": len(new_orders), "new_orders": new_orders}
+        new_orders = [
+            {
+                "id": new_id,
+                "order_number": created[new_id],
+                "original_order_id": oid,
+            }
+            for oid, new_id in id_pairs
+            if new_id in created
+        ]
+        return {"duplicated_count": len(new_orders), "new_orders": new_orders}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.delete("/bulk")
@@ -228,36 +578,113 @@ def bulk_delete(payload: BulkDelete):
     if not payload.order_ids:
         raise HTTPException(status_code=400, detail="order_ids required")
 
-    try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(payload.order_ids))
+    ids_by_shard = group_by_shard(payload.order_ids)
 
-            # Count existing
+    def delete_on_shard(shard: int, conn) -> int:
+        cursor = conn.cursor()
+        if SOFT_DELETE:
             cursor.execute(
-                f"SELECT COUNT(1) FROM orders WHERE id IN ({placeholders})",
-                payload.order_ids,
+                f"""
+                UPDATE orders SET deleted_at = {NOW_SQL}, updated_at = {NOW_SQL}
+                WHERE id IN (SELECT value FROM json_each(?)) AND deleted_at IS NULL
+                """,
+                (json.dumps(ids_by_shard[shard]),),
             )
-            existing_count = cursor.fetchone()[0]
-
+        else:
             cursor.execute(
-                f"DELETE FROM orders WHERE id IN ({placeholders})",
-                payload.order_ids,
+                "DELETE FROM orders WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids_by_shard[shard]),),
             )
+        return cursor.rowcount
 
-            deleted_count = cursor.rowcount if cursor.rowcount is not None else existing_count
-            return {"deleted_count": deleted_count, "deleted_ids": payload.order_ids}
+    try:
+        deleted_count = sum(fan_out(delete_on_shard, ids_by_shard).values())
+        return {"deleted_count": deleted_count, "deleted_ids": payload.order_ids}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
+
+
+def order_import_row(record: dict) -> tuple:
+    """Validate one imported order; CSV rows use flat customer_* columns."""
+    if "customer" not in record:
+        customer = {
+            "name": record.get("customer_name"),
+            "email": record.get("customer_email"),
+            "avatar": record.get("customer_avatar") or None,
+        }
+        record = {key: value for key, value in record.items() if not key.startswith("customer_")}
+        record["customer"] = customer
+    order = OrderCreate(**record)
+    if order.status not in ALLOWED_STATUSES:
+        raise RecordError("Invalid status")
+    if order.payment_status not in ALLOWED_PAYMENT:
+        raise RecordError("Invalid payment_status")
+
+    return (
+        new_order_id(),
+        order.customer.name,
+        order.customer.email,
+        order.customer.avatar,
+        order.order_date or None,
+        order.status,
+        order.total_amount,
+        order.payment_status,
+    )
+
+
+def insert_orders(rows: List[tuple]) -> int:
+    now_iso = utc_now()
+    rows_by_shard = group_by_shard(rows, key=lambda row: row[0])
+
+    def insert_on_shard(shard: int, conn) -> int:
+        shard_rows = rows_by_shard[shard]
+        cursor = conn.cursor()
+        # Hold the write lock from reading the last order number to the insert
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(first_order_number_sql(shard))
+        first_number = cursor.fetchone()[0]
+        cursor.executemany(
+            f"INSERT INTO orders ({INSERT_ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (row[0], f"#ORD{first_number + index * DATABASE_SHARDS}", *row[1:], now_iso, now_iso)
+                for index, row in enumerate(shard_rows)
+            ],
+        )
+        return len(shard_rows)
+
+    return sum(fan_out(insert_on_shard, rows_by_shard).values())
+
+
+@router.post("/import")
+async def import_orders(request: Request):
+    """Bulk-create orders from a streamed NDJSON or CSV body.
+
+    NDJSON lines use the POST /orders body shape. CSV (Content-Type: text/csv)
+    uses a header with customer_name, customer_email, customer_avatar,
+    total_amount, status, payment_status and order_date. Rows are validated
+    with OrderCreate and inserted in chunks; invalid lines are skipped and
+    listed in the error report.
+    """
+    try:
+        return await import_records(request, order_import_row, insert_orders)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise db_error(e)
+
 
 @router.get("/stats")
-def order_stats():
+def order_stats(request: Request, response: Response, include_archived: bool = Query(False)):
     """Return aggregated order statistics for dashboard cards.
 
     - total_orders_this_month: count of orders with order_date in current month
     - pending_orders: count where status = 'pending'
     - shipped_orders: count where status = 'completed' (mapping 'completed' -> 'shipped')
     - refunded_orders: count where status = 'refunded'
+
+    The ETag covers the orders table version and the current month. No
+    Last-Modified is sent because the month rollover changes the counts
+    without any write. include_archived=true also counts archived orders.
     """
     try:
         from datetime import datetime
@@ -268,82 +695,413 @@ def order_stats():
             # Current year-month for order_date (YYYY-MM)
             ym = datetime.now().strftime("%Y-%m")
 
-            cursor.execute(
-                "SELECT COUNT(1) FROM orders WHERE order_date LIKE ?",
-                (f"{ym}-%",),
+            version, _ = orders_version(conn)
+            etag = make_etag("orders-stats", version, ym, include_archived)
+            cached = not_modified(request, etag)
+            if cached is not None:
+                return cached
+
+            def compute_stats() -> dict:
+                if not include_archived and hot_set.catch_up(conn, version):
+                    total_this_month, by_status = hot_set.stats(ym)
+                    pending = by_status.get("pending", 0)
+                    shipped = by_status.get("completed", 0)
+                    refunded = by_status.get("refunded", 0)
+                else:
+
+                    def table_stats(shard_cursor, table: str) -> tuple:
+                        shard_cursor.execute(
+                            f"SELECT COUNT(1) FROM {table} WHERE order_date LIKE ? AND deleted_at IS NULL",
+                            (f"{ym}-%",),
+                        )
+                        total_this_month = shard_cursor.fetchone()[0]
+
+                        shard_cursor.execute(
+                            f"SELECT COUNT(1) FROM {table} WHERE status = 'pending' AND deleted_at IS NULL"
+                        )
+                        pending = shard_cursor.fetchone()[0]
+
+                        shard_cursor.execute(
+                            f"SELECT COUNT(1) FROM {table} WHERE status = 'completed' AND deleted_at IS NULL"
+                        )
+                        shipped = shard_cursor.fetchone()[0]
+
+                        shard_cursor.execute(
+                            f"SELECT COUNT(1) FROM {table} WHERE status = 'refunded' AND deleted_at IS NULL"
+                        )
+                        refunded = shard_cursor.fetchone()[0]
+                        return total_this_month, pending, shipped, refunded
+
+                    def shard_stats(shard: int, shard_conn) -> List[tuple]:
+                        tables = ["orders"]
+                        if include_archived and attach_archive(shard_conn, shard):
+                            tables.append("archive.orders")
+                        shard_cursor = shard_conn.cursor()
+                        return [table_stats(shard_cursor, table) for table in tables]
+
+                    counts_by_table = [
+                        counts
+                        for shard_counts in on_all_shards(conn, shard_stats)
+                        for counts in shard_counts
+                    ]
+                    total_this_month, pending, shipped, refunded = (
+                        sum(counts) for counts in zip(*counts_by_table)
+                    )
+
+                return {
+                    "total_orders_this_month": total_this_month,
+                    "pending_orders": pending,
+                    "shipped_orders": shipped,
+                    "refunded_orders": refunded,
+                }
+
+            body = stats_reads.do(etag, compute_stats)
+            response.headers.update(validator_headers(etag))
+            return body
+    except Exception as e:
+        raise db_error(e)
+
+
+@router.get("/dashboard")
+def order_dashboard(
+    request: Request,
+    response: Response,
+    status: str = Query("all"),
+    limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
+):
+    """Stats, per-status counts and the first page of orders in one response.
+
+    Everything comes from one read transaction per shard (one snapshot when
+    unsharded), so the numbers agree with each other and with the rows.
+    Sharded, each shard is consistent on its own, as with GET /orders.
+    The ETag works like the stats one: no Last-Modified.
+    """
+    if status != "all" and status not in ALLOWED_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status filter")
+    projection = parse_fields(fields)
+    try:
+        from datetime import datetime
+
+        with get_db() as conn:
+            ym = datetime.now().strftime("%Y-%m")
+            version, _ = orders_version(conn)
+            etag = make_etag(
+                "orders-dashboard", version, ym, status, limit, projection, include_archived
             )
-            total_this_month = cursor.fetchone()[0]
+            cached = not_modified(request, etag)
+            if cached is not None:
+                return cached
+
+            def compute_dashboard() -> dict:
+                status_filter = None if status == "all" else status
+                if not include_archived and hot_set.catch_up(conn, version):
+                    total_this_month, by_status, total, rows = hot_set.stats_and_page(
+                        ym, status_filter, limit
+                    )
+                else:
+                    merged = DATABASE_SHARDS > 1 or include_archived
+                    columns = select_columns(
+                        projection, extra=("id", "created_at") if merged else ()
+                    )
+                    where = "WHERE deleted_at IS NULL"
+                    params: List = []
+                    if status_filter is not None:
+                        where += " AND status = ?"
+                        params.append(status_filter)
+
+                    def shard_dashboard(shard: int, shard_conn) -> List[tuple]:
+                        tables = ["orders"]
+                        if include_archived and attach_archive(shard_conn, shard):
+                            tables.append("archive.orders")
+                        shard_cursor = shard_conn.cursor()
+                        # Counts and rows of every table read the same snapshot;
+                        # get_db() ends the transaction
+                        shard_cursor.execute("BEGIN")
+                        results = []
+                        for table in tables:
+                            shard_cursor.execute(
+                                f"SELECT status, COUNT(1) FROM {table} "
+                                "WHERE deleted_at IS NULL GROUP BY status"
+                            )
+                            table_by_status = dict(shard_cursor.fetchall())
+                            shard_cursor.execute(
+                                f"SELECT COUNT(1) FROM {table} WHERE order_date LIKE ? AND deleted_at IS NULL",
+                                (f"{ym}-%",),
+                            )
+                            table_this_month = shard_cursor.fetchone()[0]
+                            shard_cursor.execute(
+                                f"""
+                                SELECT {columns}
+                                FROM {table}
+                                {where}
+                                ORDER BY created_at DESC, id DESC
+                                LIMIT ?
+                                """,
+                                params + [limit],
+                            )
+                            results.append(
+                                (table_this_month, table_by_status, shard_cursor.fetchall())
+                            )
+                        return results
+
+                    results = [
+                        result
+                        for shard_results in on_all_shards(conn, shard_dashboard)
+                        for result in shard_results
+                    ]
+                    total_this_month = sum(this_month for this_month, _, _ in results)
+                    by_status = {}
+                    for _, table_by_status, _ in results:
+                        for name, count in table_by_status.items():
+                            by_status[name] = by_status.get(name, 0) + count
+                    total = (
+                        sum(by_status.values())
+                        if status_filter is None
+                        else by_status.get(status_filter, 0)
+                    )
+                    pages = [rows for _, _, rows in results]
+                    rows = merge_newest_first(pages, 0, limit) if merged else pages[0]
+
+                counts = {"all": sum(by_status.values())}
+                counts.update({name: by_status.get(name, 0) for name in sorted(ALLOWED_STATUSES)})
+                return {
+                    "stats": {
+                        "total_orders_this_month": total_this_month,
+                        "pending_orders": by_status.get("pending", 0),
+                        "shipped_orders": by_status.get("completed", 0),
+                        "refunded_orders": by_status.get("refunded", 0),
+                    },
+                    "counts": counts,
+                    "orders": [row_to_order(row, projection) for row in rows],
+                    "total": total,
+                    "page": 1,
+                    "limit": limit,
+                    "total_pages": (total + limit - 1) // limit,
+                }
+
+            body = dashboard_reads.do(etag, compute_dashboard)
+            response.headers.update(validator_headers(etag))
+            return body
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise db_error(e)
 
-            cursor.execute("SELECT COUNT(1) FROM orders WHERE status = 'pending'")
-            pending = cursor.fetchone()[0]
 
-            cursor.execute("SELECT COUNT(1) FROM orders WHERE status = 'completed'")
-            shipped = cursor.fetchone()[0]
+MAX_CHANGES_WAIT_SECONDS = 30
+# Upper bound on a single wait, so writers in other processes are noticed too
+CHANGES_RECHECK_SECONDS = 1.0
 
-            cursor.execute("SELECT COUNT(1) FROM orders WHERE status = 'refunded'")
-            refunded = cursor.fetchone()[0]
 
-            return {
-                "total_orders_this_month": total_this_month,
-                "pending_orders": pending,
-                "shipped_orders": shipped,
-                "refunded_orders": refunded,
+def fetch_changes(conn, since: int, limit: int) -> List:
+    cursor = conn.cursor()
+    columns = ", ".join(f"o.{column}" for column in ORDER_COLUMNS)
+    cursor.execute(
+        f"""
+        SELECT c.seq, c.op, c.order_id, {columns}
+        FROM order_changes c
+        LEFT JOIN orders o ON o.id = c.order_id AND c.op = 'upsert' AND o.deleted_at IS NULL
+        WHERE c.seq > ?
+        ORDER BY c.seq
+        LIMIT ?
+        """,
+        (since, limit),
+    )
+    return cursor.fetchall()
+
+
+@router.get("/changes")
+def order_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=MAX_CHANGES_WAIT_SECONDS),
+):
+    """Return order upserts and deletes with a sequence number above `since`.
+
+    Each order appears at most once, with its current state. Pass the returned
+    `last_seq` as the next `since`. With `wait` > 0 the request long-polls until
+    a change is committed or the wait expires. A `since` older than the
+    retained history answers 410, and the client must reload the full list.
+    Sequence numbers are per database file, so the feed is not available
+    with sharded storage (501).
+    """
+    if DATABASE_SHARDS > 1:
+        raise HTTPException(
+            status_code=501, detail="Change feed is not available with sharded storage"
+        )
+    try:
+        deadline = time.monotonic() + wait
+        while True:
+            generation = commit_generation()
+            with get_db() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT purged_through FROM _change_feed_state WHERE name = 'orders'"
+                )
+                state = cursor.fetchone()
+                if state is not None and since < state[0]:
+                    raise HTTPException(
+                        status_code=410, detail="Change history expired; resync required"
+                    )
+                rows = fetch_changes(conn, since, limit + 1)
+
+            remaining = deadline - time.monotonic()
+            if rows or remaining <= 0:
+                break
+            wait_for_commit(generation, min(remaining, CHANGES_RECHECK_SECONDS))
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        changes = [
+            {
+                "seq": row["seq"],
+                "op": row["op"],
+                "id": row["order_id"],
+                "order": row_to_order(row) if row["op"] == "upsert" else None,
             }
+            for row in rows
+        ]
+        last_seq = rows[-1]["seq"] if rows else since
+        return {"changes": changes, "last_seq": last_seq, "has_more": has_more}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise db_error(e)
+
+
+@router.post("/batch-get")
+def batch_get_orders(request: Request, payload: BatchGet, fields: Optional[str] = Query(None)):
+    """Fetch many orders by id in one query.
+
+    Ids are passed as a single JSON parameter, so there is no bound-variable
+    limit on how many can be requested. Orders come back in request order
+    (duplicates collapsed) and unknown ids are listed in missing_ids.
+    """
+    projection = parse_fields(fields)
+    fmt = negotiate(request)
+    order_ids = list(dict.fromkeys(payload.order_ids))
+    if not order_ids:
+        raise HTTPException(status_code=400, detail="order_ids required")
+
+    ids_by_shard = group_by_shard(order_ids)
+
+    def fetch_on_shard(shard: int, conn) -> List:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT {select_columns(projection, extra=('id',))}
+            FROM orders
+            WHERE id IN (SELECT value FROM json_each(?)) AND deleted_at IS NULL
+            """,
+            (json.dumps(ids_by_shard[shard]),),
+        )
+        return cursor.fetchall()
+
+    try:
+        found = {
+            row["id"]: row
+            for rows in fan_out(fetch_on_shard, ids_by_shard).values()
+            for row in rows
+        }
+        orders = [row_to_order(found[oid], projection) for oid in order_ids if oid in found]
+        missing_ids = [oid for oid in order_ids if oid not in found]
+        body = {"orders": orders, "missing_ids": missing_ids}
+        if fmt is not None:
+            return columnar_response(body, "orders", fmt, order_column_names(projection))
+        return body
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.get("/{order_id}")
-def get_order(order_id: str):
+def get_order(
+    order_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
+):
+    projection = parse_fields(fields)
     try:
-        with get_db() as conn:
+        shard = shard_for(order_id)
+        with get_db(shard) as conn:
             cursor = conn.cursor()
+            table = "orders"
+            if include_archived:
+                cursor.execute(
+                    "SELECT 1 FROM orders WHERE id = ? AND deleted_at IS NULL", (order_id,)
+                )
+                if cursor.fetchone() is None and attach_archive(conn, shard):
+                    table = "archive.orders"
+            # The row version (migration 010) changes on every write, unlike
+            # updated_at (one-second resolution). Archived orders never change.
+            version = "version" if table == "orders" else "0 AS version"
+            if is_conditional(request):
+                # Cheap validator check before fetching the full row
+                cursor.execute(
+                    f"SELECT updated_at, {version} FROM {table} WHERE id = ? AND deleted_at IS NULL",
+                    (order_id,),
+                )
+                current = cursor.fetchone()
+                if current is None:
+                    raise HTTPException(status_code=404, detail="Order not found")
+                cached = not_modified(
+                    request,
+                    make_etag(order_id, current[1], projection),
+                    to_http_date(current[0]),
+                )
+                if cached is not None:
+                    return cached
+
             cursor.execute(
-                """
-                SELECT id, order_number, customer_name, customer_email, customer_avatar,
-                       order_date, status, total_amount, payment_status, created_at, updated_at
-                FROM orders WHERE id = ?
+                f"""
+                SELECT {select_columns(projection, extra=('updated_at',))}, {version}
+                FROM {table} WHERE id = ? AND deleted_at IS NULL
                 """,
                 (order_id,),
             )
             row = cursor.fetchone()
             if row is None:
                 raise HTTPException(status_code=404, detail="Order not found")
-            return row_to_order(row)
+            response.headers.update(
+                validator_headers(
+                    make_etag(order_id, row["version"], projection),
+                    to_http_date(row["updated_at"]),
+                )
+            )
+            return row_to_order(row, projection)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.post("", status_code=201)
-def create_order(order: OrderCreate):
+def create_order(order: OrderCreate, fields: Optional[str] = Query(None)):
+    projection = parse_fields(fields)
     if order.status not in ALLOWED_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status")
     if order.payment_status not in ALLOWED_PAYMENT:
         raise HTTPException(status_code=400, detail="Invalid payment_status")
 
     try:
-        import uuid
-        from datetime import datetime
-
-        with get_db() as conn:
+        order_id = new_order_id()
+        shard = shard_for(order_id)
+        with get_db(shard) as conn:
             cursor = conn.cursor()
-            order_id = str(uuid.uuid4())
-            order_number = next_order_number(conn)
-            now_iso = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+            now_iso = utc_now()
 
+            # Numbering, insert and read-back in a single statement
             cursor.execute(
-                """
-                INSERT INTO orders (
-                    id, order_number, customer_name, customer_email, customer_avatar,
-                    order_date, status, total_amount, payment_status,
-                    created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                f"""
+                INSERT INTO orders ({INSERT_ORDER_COLUMNS})
+                SELECT ?, '#ORD' || ({first_order_number_sql(shard)}), ?, ?, ?, ?, ?, ?, ?, ?, ?
+                RETURNING {select_columns(projection)}
                 """,
                 (
                     order_id,
-                    order_number,
                     order.customer.name,
                     order.customer.email,
                     order.customer.avatar,
@@ -355,85 +1113,86 @@ def create_order(order: OrderCreate):
                     now_iso,
                 ),
             )
-
-            cursor.execute(
-                "SELECT * FROM orders WHERE id = ?",
-                (order_id,),
-            )
             row = cursor.fetchone()
-            return row_to_order(row)
+            return row_to_order(row, projection)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.put("/{order_id}")
 def update_order(order_id: str, order: OrderUpdate):
+    fields = []
+    values = []
+
+    if order.customer is not None:
+        fields.extend(["customer_name = ?", "customer_email = ?", "customer_avatar = ?"])
+        values.extend([order.customer.name, order.customer.email, order.customer.avatar])
+    if order.total_amount is not None:
+        fields.append("total_amount = ?")
+        values.append(order.total_amount)
+    if order.status is not None:
+        if order.status not in ALLOWED_STATUSES:
+            raise HTTPException(status_code=400, detail="Invalid status")
+        fields.append("status = ?")
+        values.append(order.status)
+    if order.payment_status is not None:
+        if order.payment_status not in ALLOWED_PAYMENT:
+            raise HTTPException(status_code=400, detail="Invalid payment_status")
+        fields.append("payment_status = ?")
+        values.append(order.payment_status)
+    if order.order_date is not None:
+        fields.append("order_date = ?")
+        values.append(order.order_date)
+
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    fields.append(f"updated_at = {NOW_SQL}")
+    set_clause = ", ".join(fields)
+    values.append(order_id)
+
     try:
-        with get_db() as conn:
+        with get_db(shard_for(order_id)) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id FROM orders WHERE id = ?", (order_id,))
-            if cursor.fetchone() is None:
-                raise HTTPException(status_code=404, detail="Order not found")
-
-            fields = []
-            values = []
-
-            if order.customer is not None:
-                fields.extend(["customer_name = ?", "customer_email = ?", "customer_avatar = ?"])
-                values.extend([order.customer.name, order.customer.email, order.customer.avatar])
-            if order.total_amount is not None:
-                fields.append("total_amount = ?")
-                values.append(order.total_amount)
-            if order.status is not None:
-                if order.status not in ALLOWED_STATUSES:
-                    raise HTTPException(status_code=400, detail="Invalid status")
-                fields.append("status = ?")
-                values.append(order.status)
-            if order.payment_status is not None:
-                if order.payment_status not in ALLOWED_PAYMENT:
-                    raise HTTPException(status_code=400, detail="Invalid payment_status")
-                fields.append("payment_status = ?")
-                values.append(order.payment_status)
-            if order.order_date is not None:
-                fields.append("order_date = ?")
-                values.append(order.order_date)
-
-            if not fields:
-                raise HTTPException(status_code=400, detail="No fields to update")
-
-            fields.append("updated_at = CURRENT_TIMESTAMP")
-            set_clause = ", ".join(fields)
-            values.append(order_id)
-
-            cursor.execute(f"UPDATE orders SET {set_clause} WHERE id = ?", values)
-
+            # Update and read back in one statement; no row means no such order
             cursor.execute(
-                """
-                SELECT id, order_number, customer_name, customer_email, customer_avatar,
-                       order_date, status, total_amount, payment_status, created_at, updated_at
-                FROM orders WHERE id = ?
+                f"""
+                UPDATE orders SET {set_clause}
+                WHERE id = ? AND deleted_at IS NULL
+                RETURNING {select_columns()}
                 """,
-                (order_id,),
+                values,
             )
             row = cursor.fetchone()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Order not found")
             return row_to_order(row)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
 
 
 @router.delete("/{order_id}", status_code=204)
 def delete_order(order_id: str):
     try:
-        with get_db() as conn:
+        with get_db(shard_for(order_id)) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id FROM orders WHERE id = ?", (order_id,))
+            if SOFT_DELETE:
+                cursor.execute(
+                    f"""
+                    UPDATE orders SET deleted_at = {NOW_SQL}, updated_at = {NOW_SQL}
+                    WHERE id = ? AND deleted_at IS NULL
+                    RETURNING id
+                    """,
+                    (order_id,),
+                )
+            else:
+                cursor.execute("DELETE FROM orders WHERE id = ? RETURNING id", (order_id,))
             if cursor.fetchone() is None:
                 raise HTTPException(status_code=404, detail="Order not found")
-            cursor.execute("DELETE FROM orders WHERE id = ?", (order_id,))
             return None
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise db_error(e)
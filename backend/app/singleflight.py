@@ -0,0 +1,69 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+The first caller for a key runs the query; callers arriving with the same
+key while it is in flight wait for it and get the same result (or
+exception). Nothing is kept once the call finishes, so a result is never
+older than the in-flight window. Callers build the key from the table
+version, so a request that starts after a write never joins a query that
+began before it.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# All groups by name, for GET /admin/coalescing
+groups: Dict[str, "SingleFlight"] = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        groups[name] = self
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn()'s result, sharing one execution among concurrent callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+        }
@@ -0,0 +1,122 @@
+"""Recording of API request traces for replay with workload.py.
+
+With WORKLOAD_RECORD=<file> every request to /items or /orders is appended
+to that file as one NDJSON line (the trace format workload.py replays):
+
+    {"at": 12.345, "kind": "filter", "method": "GET", "path": "/orders?status=pending", "body": null}
+
+`at` is the arrival time in seconds since recording started and `kind` the
+request type (see request_kind) used to group results. JSON bodies up to
+WORKLOAD_RECORD_MAX_BODY bytes are kept; requests with larger or non-JSON
+bodies (CSV imports) are not recorded. Lines are written when a request
+finishes, so they are not strictly ordered by `at`.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qs
+
+RECORD_PATH = os.getenv("WORKLOAD_RECORD")
+RECORD_MAX_BODY = int(os.getenv("WORKLOAD_RECORD_MAX_BODY", str(64 * 1024)))
+
+RECORDED_PREFIXES = ("/items", "/orders")
+RECORDED_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+# GET /orders/<path> that are not an order id
+ORDER_READ_KINDS = {"stats": "stats", "dashboard": "dashboard", "changes": "changes"}
+
+
+def request_kind(method: str, path: str, query: str = "") -> str:
+    """Request type of a trace entry: list, filter, stats, get, bulk, create, ..."""
+    parts = path.strip("/").split("/")
+    if parts[0] == "items":
+        return "items" if method == "GET" else "items_write"
+    if len(parts) > 1 and parts[1] in ("bulk", "import"):
+        return "bulk"
+    if len(parts) > 1 and parts[1] == "batch-get":
+        return "batch_get"
+    if len(parts) == 1:
+        if method == "POST":
+            return "create"
+        status = parse_qs(query).get("status", ["all"])[0]
+        return "list" if status == "all" else "filter"
+    if method == "GET":
+        return ORDER_READ_KINDS.get(parts[1], "get")
+    return "delete" if method == "DELETE" else "update"
+
+
+# Body of a request that cannot be replayed (not JSON)
+_UNRECORDABLE = object()
+
+
+def _json_body(raw: bytes) -> Optional[object]:
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return _UNRECORDABLE
+
+
+class TraceRecorder:
+    """ASGI middleware that appends each recorded request to an NDJSON trace."""
+
+    def __init__(self, app, path: str = RECORD_PATH, max_body: int = RECORD_MAX_BODY):
+        self.app = app
+        self.max_body = max_body
+        self.start = time.monotonic()
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def _write(self, entry: dict) -> None:
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in RECORDED_METHODS
+            or not scope["path"].startswith(RECORDED_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        at = time.monotonic() - self.start
+        chunks = []
+        size = 0
+        recordable = True
+
+        async def recording_receive():
+            nonlocal size, recordable
+            message = await receive()
+            if message["type"] == "http.request" and recordable:
+                size += len(message.get("body", b""))
+                if size > self.max_body:
+                    recordable = False
+                    chunks.clear()
+                else:
+                    chunks.append(message.get("body", b""))
+            return message
+
+        try:
+            await self.app(scope, recording_receive, send)
+        finally:
+            body = _json_body(b"".join(chunks)) if recordable else _UNRECORDABLE
+            if body is not _UNRECORDABLE:
+                query = scope.get("query_string", b"").decode("latin-1")
+                self._write(
+                    {
+                        "at": round(at, 4),
+                        "kind": request_kind(scope["method"], scope["path"], query),
+                        "method": scope["method"],
+                        "path": scope["path"] + (f"?{query}" if query else ""),
+                        "body": body,
+                    }
+                )
+
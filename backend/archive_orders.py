@@ -0,0 +1,20 @@
+"""
+Archive Orders
+
+Moves completed and refunded orders that have not changed for
+ORDERS_ARCHIVE_AFTER_DAYS (or --after-days) into each shard's archive file;
+see app/archive.py. Safe to run while the API is serving, and to re-run.
+"""
+
+import argparse
+
+from app.archive import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, archive_orders
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old finished orders to the archive")
+    parser.add_argument("--after-days", type=float, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    result = archive_orders(after_days=args.after_days, batch_size=args.batch_size)
+    print(f"Archived {result['archived']} orders.")
@@ -0,0 +1,74 @@
+"""
+Online Backup
+
+Writes a consistent snapshot of the database (every shard and order
+archive) while the API keeps serving reads and writes; see app/backup.py.
+
+Usage (from backend/):
+    python backup.py [--dir backups] [--gzip] [--pages 256] [--pause-ms 10] [--keep 7]
+"""
+
+import argparse
+import sys
+import time
+
+from app.backup import (
+    BACKUP_COMPRESS,
+    BACKUP_DIR,
+    BACKUP_KEEP,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_PAUSE_SECONDS,
+    backup_database,
+)
+from app.database import DATABASE_SHARDS
+
+
+class ProgressPrinter:
+    """Prints a progress line per file at most every `interval` seconds."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.last = 0.0
+        self.start = time.perf_counter()
+
+    def __call__(self, label: str, copied: int, total: int) -> None:
+        now = time.perf_counter()
+        if copied < total and now - self.last < self.interval:
+            return
+        self.last = now
+        percent = copied * 100 // total if total else 100
+        print(f"{label}: {percent:3d}% ({copied}/{total} pages, {now - self.start:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Back up the database without stopping the API")
+    parser.add_argument("--dir", default=BACKUP_DIR, help="Directory for snapshots")
+    parser.add_argument("--gzip", action="store_true", default=BACKUP_COMPRESS, help="Compress snapshots")
+    parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="Pages copied per step")
+    parser.add_argument(
+        "--pause-ms", type=float, default=BACKUP_STEP_PAUSE_SECONDS * 1000, help="Pause between steps"
+    )
+    parser.add_argument("--keep", type=int, default=BACKUP_KEEP, help="Snapshots to keep (0: all)")
+    args = parser.parse_args()
+
+    try:
+        result = backup_database(
+            directory=args.dir,
+            pages=args.pages,
+            pause=args.pause_ms / 1000,
+            compress=args.gzip,
+            keep=args.keep,
+            progress=ProgressPrinter(),
+        )
+    except KeyboardInterrupt:
+        sys.exit("Backup cancelled")
+
+    print(
+        f"Backed up {len(result['files'])} file(s) of {DATABASE_SHARDS} shard(s), {result['pages']} pages, "
+        f"{result['bytes'] / 2**20:.1f} MiB in {result['seconds']:.1f}s "
+        f"({result['mib_per_second']} MiB/s), stored {result['stored_bytes'] / 2**20:.1f} MiB"
+    )
+    for path in result["files"]:
+        print(f"  {path}")
+    for name in result["pruned"]:
+        print(f"  removed {name}")
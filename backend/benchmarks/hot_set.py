@@ -0,0 +1,171 @@
+"""
+Orders hot set benchmark: memory footprint and read latency
+
+Fills a throwaway database with synthetic orders, loads the columnar hot set
+(app/hot_set.py) and reports its memory use, extrapolated to one million
+orders, next to the latency of the dashboard reads answered from the hot set
+and from SQLite.
+
+Usage (from backend/, needs numpy):
+    python benchmarks/hot_set.py [--orders 200000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix="bench-")
+# DATABASE_PATH=:memory: runs it without disk I/O
+os.environ.setdefault("DATABASE_PATH", os.path.join(_tmpdir, "bench.db"))
+os.environ["ORDERS_HOT_SET"] = "1"
+
+STATUSES = ("pending", "completed", "refunded")
+CUSTOMERS = 5000
+INSERT_SQL = """
+    INSERT INTO orders (
+        id, order_number, customer_name, customer_email, customer_avatar,
+        order_date, status, total_amount, payment_status, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def fill_orders(count: int) -> None:
+    from app.database import get_db
+
+    rng = random.Random(42)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        batch = []
+        for number in range(count):
+            customer = rng.randrange(CUSTOMERS)
+            created = (
+                f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                f"T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+            )
+            batch.append(
+                (
+                    str(uuid.uuid4()),
+                    f"#ORD{1001 + number}",
+                    f"Customer {customer}",
+                    f"customer{customer}@example.com",
+                    f"/avatars/{customer % 50}.jpg",
+                    created[:10],
+                    rng.choice(STATUSES),
+                    round(rng.uniform(5, 500), 2),
+                    rng.choice(("paid", "unpaid")),
+                    created,
+                    created,
+                )
+            )
+            if len(batch) == 10000:
+                cursor.executemany(INSERT_SQL, batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_SQL, batch)
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the orders hot set")
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    import contextlib
+    import io
+
+    from app.database import get_db
+    from app.hot_set import hot_set
+    from migrate import run_migrations
+
+    if not hot_set.enabled:
+        raise SystemExit("numpy is required for the hot set")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations("upgrade")
+
+    start = time.perf_counter()
+    fill_orders(args.orders)
+    print(f"Inserted {args.orders} orders in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    hot_set.load()
+    print(f"Loaded hot set in {time.perf_counter() - start:.2f}s")
+
+    report = hot_set.memory_report()
+    print()
+    print(f"{'column':<20} {'bytes':>14}")
+    print("-" * 35)
+    for name, size in report["columns_bytes"].items():
+        print(f"{name:<20} {size:>14,}")
+    print(f"{'dictionaries':<20} {sum(report['dictionaries_bytes'].values()):>14,}")
+    print(f"{'id index':<20} {report['id_index_bytes']:>14,}")
+    print(f"{'total':<20} {report['total_bytes']:>14,}")
+    print(
+        f"{report['bytes_per_order']} bytes per order, "
+        f"{report['mib_per_million_orders']} MiB per million orders"
+    )
+
+    def sql(query: str, params=()):
+        with get_db() as conn:
+            return conn.execute(query, params).fetchall()
+
+    # The SQL side of list reads includes the COUNT(1) the endpoint runs for `total`
+    cases = [
+        (
+            "list page 1 (all)",
+            lambda: hot_set.page(None, 10, 0),
+            lambda: [
+                sql("SELECT COUNT(1) FROM orders WHERE deleted_at IS NULL"),
+                sql(
+                    "SELECT * FROM orders WHERE deleted_at IS NULL "
+                    "ORDER BY created_at DESC, id DESC LIMIT 10"
+                ),
+            ],
+        ),
+        (
+            "list page 50 (pending)",
+            lambda: hot_set.page("pending", 10, 490),
+            lambda: [
+                sql("SELECT COUNT(1) FROM orders WHERE deleted_at IS NULL AND status = 'pending'"),
+                sql(
+                    "SELECT * FROM orders WHERE deleted_at IS NULL AND status = 'pending' "
+                    "ORDER BY created_at DESC, id DESC LIMIT 10 OFFSET 490"
+                ),
+            ],
+        ),
+        (
+            "stats",
+            lambda: hot_set.stats("2024-06"),
+            lambda: [
+                sql("SELECT COUNT(1) FROM orders WHERE order_date LIKE '2024-06-%' AND deleted_at IS NULL"),
+                *[
+                    sql(f"SELECT COUNT(1) FROM orders WHERE status = '{s}' AND deleted_at IS NULL")
+                    for s in STATUSES
+                ],
+            ],
+        ),
+    ]
+
+    print()
+    print(f"{'read':<24} {'hot set ms':>11} {'sqlite ms':>10}")
+    print("-" * 47)
+    for name, hot, cold in cases:
+        print(f"{name:<24} {timed(hot, args.repeat):>11.2f} {timed(cold, args.repeat):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
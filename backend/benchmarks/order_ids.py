@@ -0,0 +1,128 @@
+"""
+Insert cost of random vs time-ordered order ids
+
+Creates two throwaway databases with the full migrated schema (triggers
+and indexes included) and inserts the same synthetic orders into both,
+one with uuid4 ids and one with UUIDv7 ids (app/ids.py), committing every
+--batch rows. Reports insert rate as the table grows, the final file size
+and the size of the primary key index.
+
+Usage (from backend/):
+    python benchmarks/order_ids.py [--orders 1000000] [--batch 100]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.ids import new_id  # noqa: E402
+
+INSERT_SQL = """
+    INSERT INTO orders (
+        id, order_number, customer_name, customer_email, customer_avatar,
+        order_date, status, total_amount, payment_status, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# Page cache in the benchmark stays the SQLite default (2 MB), so once the
+# id index outgrows it random inserts start reading pages back from disk
+REPORT_EVERY = 10
+
+
+def migrated_database(tmpdir: str, name: str) -> str:
+    path = os.path.join(tmpdir, f"{name}.db")
+    subprocess.run(
+        [sys.executable, "migrate.py", "upgrade"],
+        env=dict(os.environ, DATABASE_PATH=path, DATABASE_SHARDS="1"),
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        check=True,
+    )
+    return path
+
+
+def index_bytes(conn: sqlite3.Connection) -> int:
+    """Size of the orders primary key index, via dbstat when compiled in."""
+    try:
+        row = conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name = 'sqlite_autoindex_orders_1'"
+        ).fetchone()
+        return row[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+
+def run(path: str, make_id, orders: int, batch: int) -> dict:
+    rng = random.Random(7)
+    conn = sqlite3.connect(path)
+    rates = []
+    chunk = max(batch, orders // REPORT_EVERY)
+    chunk_start = time.perf_counter()
+    start = chunk_start
+    for number in range(orders):
+        customer = rng.randrange(5000)
+        created = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00"
+        conn.execute(
+            INSERT_SQL,
+            (
+                make_id(),
+                f"#ORD{1001 + number}",
+                f"Customer {customer}",
+                f"customer{customer}@example.com",
+                f"/avatars/{customer % 50}.jpg",
+                created[:10],
+                rng.choice(("pending", "completed", "refunded")),
+                round(rng.uniform(5, 500), 2),
+                rng.choice(("paid", "unpaid")),
+                created,
+                created,
+            ),
+        )
+        if (number + 1) % batch == 0:
+            conn.commit()
+        if (number + 1) % chunk == 0:
+            now = time.perf_counter()
+            rates.append(chunk / (now - chunk_start))
+            chunk_start = now
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    result = {
+        "rate": orders / elapsed,
+        "last_rate": rates[-1] if rates else orders / elapsed,
+        "file_bytes": os.path.getsize(path),
+        "index_bytes": index_bytes(conn),
+    }
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare uuid4 and UUIDv7 order id inserts")
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench-")
+    cases = [("uuid4", lambda: str(uuid.uuid4())), ("uuid7", new_id)]
+
+    print(f"{'ids':<6} {'orders/s':>10} {'last 10%/s':>11} {'file MiB':>9} {'pk index MiB':>13}")
+    print("-" * 53)
+    for name, make_id in cases:
+        result = run(migrated_database(tmpdir, name), make_id, args.orders, args.batch)
+        print(
+            f"{name:<6} {result['rate']:>10.0f} {result['last_rate']:>11.0f} "
+            f"{result['file_bytes'] / 2**20:>9.1f} {result['index_bytes'] / 2**20:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Payload size and encode time of list responses per format
+
+Encodes the same page of synthetic orders the way GET /orders returns them:
+plain JSON through FastAPI (jsonable_encoder + JSONResponse, what a route
+returning a dict goes through) and the columnar formats of app/columnar.py,
+with and without gzip. No database is needed.
+
+Usage (from backend/):
+    python benchmarks/response_formats.py [--rows 100,1000,10000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.columnar import Format, columnar_response  # noqa: E402
+from app.ids import new_id  # noqa: E402
+from app.routes.orders import order_column_names  # noqa: E402
+
+
+def make_orders(count: int) -> list:
+    rng = random.Random(7)
+    orders = []
+    for number in range(count):
+        customer = rng.randrange(5000)
+        day = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        orders.append(
+            {
+                "id": new_id(),
+                "order_number": f"#ORD{1001 + number}",
+                "customer": {
+                    "name": f"Customer {customer}",
+                    "email": f"customer{customer}@example.com",
+                    "avatar": f"/avatars/{customer % 50}.jpg",
+                },
+                "order_date": day,
+                "status": rng.choice(["pending", "completed", "refunded"]),
+                "total_amount": round(rng.uniform(5, 500), 2),
+                "payment_status": rng.choice(["paid", "unpaid"]),
+                "created_at": f"{day}T12:00:00",
+                "updated_at": f"{day}T12:00:00",
+            }
+        )
+    return orders
+
+
+def encode_json(body: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(body)).body
+
+
+def measure(encode, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        content = encode()
+    return len(content), (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare list response formats")
+    parser.add_argument("--rows", default="100,1000,10000", help="Comma separated page sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="Encodes per measurement")
+    args = parser.parse_args()
+
+    columns = order_column_names()
+    formats = {
+        "json": None,
+        "columnar rows": Format("rows", False),
+        "columnar columns": Format("columns", False),
+        "columnar rows + gzip": Format("rows", True),
+        "columnar columns + gzip": Format("columns", True),
+    }
+    for count in (int(value) for value in args.rows.split(",")):
+        body = {"orders": make_orders(count), "total": count, "page": 1, "limit": count}
+        print(f"{count} orders")
+        baseline = None
+        for name, fmt in formats.items():
+            if fmt is None:
+                size, ms = measure(lambda: encode_json(body), args.repeat)
+                baseline = size
+            else:
+                size, ms = measure(
+                    lambda: columnar_response(body, "orders", fmt, columns).body, args.repeat
+                )
+            print(f"  {name:<24} {size:>10,d} bytes ({size / baseline:6.1%})  {ms:8.2f} ms")
@@ -0,0 +1,107 @@
+"""
+Write throughput by shard count
+
+For each shard count, starts several worker processes on one throwaway
+database (like uvicorn --workers). Each worker's threads create orders
+through the POST /orders handler, without HTTP, for a fixed time. Reports
+orders committed per second over all workers. With one shard every worker
+queues on the same SQLite write lock.
+
+Usage (from backend/):
+    python benchmarks/sharded_writes.py [--shards 1 2 4] [--processes 4] [--threads 4] [--seconds 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_worker(threads: int, seconds: float) -> dict:
+    sys.path.insert(0, BACKEND_DIR)
+    from app.routes.orders import CustomerModel, OrderCreate, create_order
+
+    order = OrderCreate(
+        customer=CustomerModel(name="Bench User", email="bench@example.com"),
+        total_amount=12.5,
+        status="pending",
+        payment_status="unpaid",
+    )
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.monotonic() + seconds
+
+    def writer(index: int) -> None:
+        while time.monotonic() < deadline:
+            try:
+                create_order(order, fields="id")
+                counts[index] += 1
+            except Exception:
+                errors[index] += 1
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return {"orders_per_second": sum(counts) / elapsed, "errors": sum(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure write throughput by shard count")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.threads, args.seconds)))
+        return
+
+    print(f"{'shards':>6} {'orders/s':>10} {'errors':>7}")
+    print("-" * 25)
+    for shards in args.shards:
+        tmpdir = tempfile.mkdtemp(prefix="bench-")
+        env = dict(
+            os.environ,
+            DATABASE_PATH=os.path.join(tmpdir, "bench.db"),
+            DATABASE_SHARDS=str(shards),
+        )
+        subprocess.run(
+            [sys.executable, "migrate.py", "upgrade"],
+            env=env,
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            check=True,
+        )
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--worker",
+            "--threads",
+            str(args.threads),
+            "--seconds",
+            str(args.seconds),
+        ]
+        workers = [
+            subprocess.Popen(command, env=env, cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True)
+            for _ in range(args.processes)
+        ]
+        results = [json.loads(worker.communicate()[0].strip().splitlines()[-1]) for worker in workers]
+        total = sum(result["orders_per_second"] for result in results)
+        errors = sum(result["errors"] for result in results)
+        print(f"{shards:>6} {total:>10.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
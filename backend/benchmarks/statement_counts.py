@@ -0,0 +1,149 @@
+"""
+Statement-count benchmark for the mutation endpoints
+
+Runs each write endpoint against a throwaway database, traces every SQL
+statement the handler issues (excluding BEGIN/COMMIT and trigger bodies) and
+reports statements per request and mean latency.
+
+Usage (from backend/, needs httpx for FastAPI's TestClient):
+    python benchmarks/statement_counts.py [--iterations 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix="bench-")
+# DATABASE_PATH=:memory: runs it without disk I/O
+os.environ.setdefault("DATABASE_PATH", os.path.join(_tmpdir, "bench.db"))
+
+import app.database as database  # noqa: E402
+
+
+class StatementCounter:
+    """sqlite3 trace callback counting statements sent by the handler.
+
+    Trigger programs are traced with the text of the statement that fired
+    them, so an immediate repeat of the previous statement is not counted.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self._last = None
+
+    def __call__(self, statement: str) -> None:
+        repeated = statement == self._last
+        self._last = statement
+        if repeated or statement.strip().upper().startswith(("BEGIN", "COMMIT", "ROLLBACK")):
+            return
+        self.count += 1
+
+
+counter = StatementCounter()
+_get_connection = database.get_connection
+
+
+def traced_connection(shard: int = 0):
+    conn = _get_connection(shard)
+    conn.set_trace_callback(counter)
+    return conn
+
+
+database.get_connection = traced_connection
+
+
+def order_payload():
+    return {
+        "customer": {"name": "Bench User", "email": "bench@example.com"},
+        "total_amount": 12.5,
+        "status": "pending",
+        "payment_status": "unpaid",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count SQL statements per write request")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    import contextlib
+    import io
+
+    from fastapi.testclient import TestClient
+
+    from migrate import run_migrations
+    from seed_orders import seed_orders
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations("upgrade")
+        seed_orders()
+
+    from app.main import app
+
+    client = TestClient(app)
+
+    def order_ids(n):
+        return [client.post("/orders", json=order_payload()).json()["id"] for _ in range(n)]
+
+    def item_id():
+        return client.post("/items", json={"name": "bench"}).json()["id"]
+
+    # name -> (setup returning an argument, request using it)
+    cases = [
+        ("POST /items", lambda: None, lambda _: client.post("/items", json={"name": "x"})),
+        ("PUT /items/{id}", item_id, lambda i: client.put(f"/items/{i}", json={"name": "y"})),
+        ("DELETE /items/{id}", item_id, lambda i: client.delete(f"/items/{i}")),
+        ("POST /orders", lambda: None, lambda _: client.post("/orders", json=order_payload())),
+        (
+            "PUT /orders/{id}",
+            lambda: order_ids(1)[0],
+            lambda o: client.put(f"/orders/{o}", json={"status": "completed"}),
+        ),
+        ("DELETE /orders/{id}", lambda: order_ids(1)[0], lambda o: client.delete(f"/orders/{o}")),
+        (
+            "PUT /orders/bulk/status (10)",
+            lambda: order_ids(10),
+            lambda ids: client.put("/orders/bulk/status", json={"order_ids": ids, "status": "refunded"}),
+        ),
+        (
+            "POST /orders/bulk/duplicate (10)",
+            lambda: order_ids(10),
+            lambda ids: client.post("/orders/bulk/duplicate", json={"order_ids": ids}),
+        ),
+        (
+            "DELETE /orders/bulk (10)",
+            lambda: order_ids(10),
+            lambda ids: client.request("DELETE", "/orders/bulk", json={"order_ids": ids}),
+        ),
+    ]
+
+    print(f"{'endpoint':<34} {'stmts/req':>10} {'mean ms':>9}")
+    print("-" * 55)
+    for name, setup, request in cases:
+        statements = 0
+        elapsed = 0.0
+        for _ in range(args.iterations):
+            arg = setup()
+            counter.reset()
+            start = time.perf_counter()
+            response = request(arg)
+            elapsed += time.perf_counter() - start
+            statements += counter.count
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name} failed: {response.status_code} {response.text}")
+        print(
+            f"{name:<34} {statements / args.iterations:>10.1f} "
+            f"{elapsed / args.iterations * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
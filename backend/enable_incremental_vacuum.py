@@ -0,0 +1,40 @@
+"""
+Enable Incremental Vacuum
+
+Switches every shard file to incremental auto-vacuum, so the purger
+(app/purger.py) can return the pages of purged orders to the OS. SQLite only
+changes the mode with a full VACUUM, which rewrites the file: it holds the
+write lock for the whole run and needs free disk space about the size of the
+file. Run it once, with the API stopped; files already in that mode are
+skipped. Databases created by migrate.py start in this mode.
+"""
+
+import argparse
+
+from app.database import connect, shard_paths
+
+INCREMENTAL = 2
+
+
+def enable_incremental_vacuum(path: str) -> bool:
+    """Rebuild the file at `path` in incremental mode; False if it already is."""
+    conn = connect(path)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == INCREMENTAL:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Switch the database to incremental auto-vacuum")
+    parser.parse_args()
+
+    for path in shard_paths():
+        if enable_incremental_vacuum(path):
+            print(f"Rebuilt {path} with incremental auto-vacuum.")
+        else:
+            print(f"{path} already uses incremental auto-vacuum.")
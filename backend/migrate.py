@@ -8,9 +8,8 @@ import os
 import glob
 import importlib.util
 import argparse
-import sqlite3
 
-from app.database import DATABASE_PATH
+from app.database import connect, shard_paths
 
 
 def get_migration_files():
@@ -30,24 +29,51 @@ def load_migration_module(filepath):
     return module
 
 
+def prepare_new_database(database_path):
+    """Apply settings SQLite only accepts before the first table exists."""
+    conn = connect(database_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(1) FROM sqlite_master")
+    if cursor.fetchone()[0] == 0:
+        # Lets the purger release freed pages with PRAGMA incremental_vacuum;
+        # stored in the header once the first table is created
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS _migrations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.commit()
+    conn.close()
+
+
 def run_migrations(action="upgrade"):
     """Run all migrations."""
     migration_files = get_migration_files()
     
     if action == "downgrade":
-        migration_files = reversed(migration_files)
+        migration_files = list(reversed(migration_files))
     
-    for filepath in migration_files:
-        module = load_migration_module(filepath)
+    # Every shard gets the full schema; migrations read DATABASE_PATH at call time
+    for database_path in shard_paths():
         if action == "upgrade":
-            module.upgrade()
-        elif action == "downgrade":
-            module.downgrade()
+            prepare_new_database(database_path)
+        for filepath in migration_files:
+            module = load_migration_module(filepath)
+            module.DATABASE_PATH = database_path
+            if action == "upgrade":
+                module.upgrade()
+            elif action == "downgrade":
+                module.downgrade()
 
 
 def list_migrations():
     """List all migrations and their status."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect(shard_paths()[0])
     cursor = conn.cursor()
     
     # Ensure migrations table exists
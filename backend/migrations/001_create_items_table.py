@@ -4,19 +4,18 @@ Version: 001
 Description: Creates the initial items table with id and name columns
 """
 
-import sqlite3
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import DATABASE_PATH
+from app.database import DATABASE_PATH, connect
 
 
 def upgrade():
     """Apply the migration."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect(DATABASE_PATH)
     cursor = conn.cursor()
     
     # Create migrations tracking table if it doesn't exist
@@ -61,7 +60,7 @@ def upgrade():
 
 def downgrade():
     """Revert the migration."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect(DATABASE_PATH)
     cursor = conn.cursor()
     
     # Drop items table
@@ -4,14 +4,13 @@ Version: 002
 Description: Creates the orders table to support the Orders API
 """
 
-import sqlite3
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import DATABASE_PATH
+from app.database import DATABASE_PATH, connect
 
 
 MIGRATION_NAME = "002_create_orders_table"
@@ -19,7 +18,7 @@ MIGRATION_NAME = "002_create_orders_table"
 
 def upgrade():
     """Apply the migration."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect(DATABASE_PATH)
     cursor = conn.cursor()
 
     # Create migrations tracking table if it doesn't exist
@@ -76,7 +75,7 @@ def upgrade():
 
 def downgrade():
     """Revert the migration."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect(DATABASE_PATH)
     cursor = conn.cursor()
 
     cursor.execute("DROP TABLE IF EXISTS orders")
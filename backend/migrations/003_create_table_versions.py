@@ -0,0 +1,114 @@
+"""
+Migration: Create table versions
+Version: 003
+Description: Adds a per-table version counter, bumped by triggers on items and
+orders, used to answer conditional GETs without reading the tables themselves
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH, connect
+
+
+MIGRATION_NAME = "003_create_table_versions"
+
+VERSIONED_TABLES = ("items", "orders")
+TRIGGER_EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+def upgrade():
+    """Apply the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Create migrations tracking table if it doesn't exist
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Check if this migration has already been applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+    if cursor.fetchone():
+        print(f"Migration {MIGRATION_NAME} already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # One counter row per table, bumped on every row change (SQLite has no
+    # statement-level triggers, so a bulk write bumps it once per row).
+    for table in VERSIONED_TABLES:
+        cursor.execute(
+            "INSERT OR IGNORE INTO _table_versions (name) VALUES (?)", (table,)
+        )
+        for event in TRIGGER_EVENTS:
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE _table_versions
+                    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE name = '{table}';
+                END
+                """
+            )
+
+    # Record this migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} applied successfully.")
+
+
+def downgrade():
+    """Revert the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    for table in VERSIONED_TABLES:
+        for event in TRIGGER_EVENTS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version_{event.lower()}")
+    cursor.execute("DROP TABLE IF EXISTS _table_versions")
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} reverted successfully.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run database migration")
+    parser.add_argument(
+        "action",
+        choices=["upgrade", "downgrade"],
+        help="Migration action to perform",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,96 @@
+"""
+Migration: Add orders projection indexes
+Version: 004
+Description: Adds covering indexes for the narrow (id, order_number, status)
+projection of the orders list, sorted by created_at with or without a status
+filter. The status-led index supersedes idx_orders_status.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH, connect
+
+
+MIGRATION_NAME = "004_add_orders_projection_indexes"
+
+
+def upgrade():
+    """Apply the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Create migrations tracking table if it doesn't exist
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Check if this migration has already been applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+    if cursor.fetchone():
+        print(f"Migration {MIGRATION_NAME} already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_orders_created_at_projection
+        ON orders(created_at, id, order_number, status)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_orders_status_created_at_projection
+        ON orders(status, created_at, id, order_number)
+        """
+    )
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_status")
+
+    # Record this migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} applied successfully.")
+
+
+def downgrade():
+    """Revert the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)")
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_status_created_at_projection")
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_created_at_projection")
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} reverted successfully.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run database migration")
+    parser.add_argument(
+        "action",
+        choices=["upgrade", "downgrade"],
+        help="Migration action to perform",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,162 @@
+"""
+Migration: Create order changes log
+Version: 005
+Description: Adds an append-only change log for orders, filled by triggers, that
+backs the GET /orders/changes feed. Each order keeps only its latest entry
+(compaction on write) and entries older than ORDER_CHANGES_RETENTION sequence
+numbers are purged.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH, connect
+
+
+MIGRATION_NAME = "005_create_order_changes"
+
+# Baked into the retention trigger when the migration runs
+ORDER_CHANGES_RETENTION = int(os.getenv("ORDER_CHANGES_RETENTION", "100000"))
+RETENTION_CHECK_EVERY = 1000
+
+
+def upgrade():
+    """Apply the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Create migrations tracking table if it doesn't exist
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Check if this migration has already been applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+    if cursor.fetchone():
+        print(f"Migration {MIGRATION_NAME} already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id TEXT NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_order_changes_order_id ON order_changes(order_id)"
+    )
+
+    # Highest sequence number dropped by retention; readers behind it must resync
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _change_feed_state (
+            name TEXT PRIMARY KEY,
+            purged_through INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cursor.execute("INSERT OR IGNORE INTO _change_feed_state (name) VALUES ('orders')")
+
+    # Every write replaces the order's previous entry, so the log holds at
+    # most one entry per order and a reader only sees the latest state.
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_orders_changes_insert
+        AFTER INSERT ON orders
+        BEGIN
+            DELETE FROM order_changes WHERE order_id = NEW.id;
+            INSERT INTO order_changes (order_id, op) VALUES (NEW.id, 'upsert');
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_orders_changes_update
+        AFTER UPDATE ON orders
+        BEGIN
+            DELETE FROM order_changes WHERE order_id IN (OLD.id, NEW.id);
+            INSERT INTO order_changes (order_id, op)
+            SELECT OLD.id, 'delete' WHERE OLD.id <> NEW.id;
+            INSERT INTO order_changes (order_id, op) VALUES (NEW.id, 'upsert');
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_orders_changes_delete
+        AFTER DELETE ON orders
+        BEGIN
+            DELETE FROM order_changes WHERE order_id = OLD.id;
+            INSERT INTO order_changes (order_id, op) VALUES (OLD.id, 'delete');
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_order_changes_retention
+        AFTER INSERT ON order_changes
+        WHEN NEW.seq % {RETENTION_CHECK_EVERY} = 0 AND NEW.seq > {ORDER_CHANGES_RETENTION}
+        BEGIN
+            DELETE FROM order_changes WHERE seq <= NEW.seq - {ORDER_CHANGES_RETENTION};
+            UPDATE _change_feed_state
+            SET purged_through = NEW.seq - {ORDER_CHANGES_RETENTION}
+            WHERE name = 'orders';
+        END
+        """
+    )
+
+    # Record this migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} applied successfully.")
+
+
+def downgrade():
+    """Revert the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_changes_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_changes_update")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_changes_delete")
+    cursor.execute("DROP TABLE IF EXISTS _change_feed_state")
+    cursor.execute("DROP TABLE IF EXISTS order_changes")
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} reverted successfully.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run database migration")
+    parser.add_argument(
+        "action",
+        choices=["upgrade", "downgrade"],
+        help="Migration action to perform",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
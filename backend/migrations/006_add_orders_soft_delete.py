@@ -0,0 +1,150 @@
+"""
+Migration: Add orders soft delete
+Version: 006
+Description: Adds orders.deleted_at for tombstone deletes. The list projection
+indexes become partial (live rows only), a partial index tracks tombstones for
+the purger, and the change log reports tombstoned orders as deletes.
+
+Purged pages are released gradually with incremental auto-vacuum. New
+databases get it from migrate.py; switching an existing file needs a full
+rebuild, which is left to enable_incremental_vacuum.py rather than run at
+startup.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH, connect
+
+
+MIGRATION_NAME = "006_add_orders_soft_delete"
+
+
+def create_projection_indexes(cursor, partial=False):
+    # SQLite only treats an index as covering if every referenced column is
+    # in it, so the partial indexes also carry deleted_at.
+    extra = ", deleted_at" if partial else ""
+    where = "WHERE deleted_at IS NULL" if partial else ""
+    cursor.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_orders_created_at_projection
+        ON orders(created_at, id, order_number, status{extra}) {where}
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_orders_status_created_at_projection
+        ON orders(status, created_at, id, order_number{extra}) {where}
+        """
+    )
+
+
+def create_changes_update_trigger(cursor, op_expression):
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_changes_update")
+    cursor.execute(
+        f"""
+        CREATE TRIGGER trg_orders_changes_update
+        AFTER UPDATE ON orders
+        BEGIN
+            DELETE FROM order_changes WHERE order_id IN (OLD.id, NEW.id);
+            INSERT INTO order_changes (order_id, op)
+            SELECT OLD.id, 'delete' WHERE OLD.id <> NEW.id;
+            INSERT INTO order_changes (order_id, op) VALUES (NEW.id, {op_expression});
+        END
+        """
+    )
+
+
+def upgrade():
+    """Apply the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Create migrations tracking table if it doesn't exist
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Check if this migration has already been applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+    if cursor.fetchone():
+        print(f"Migration {MIGRATION_NAME} already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute("ALTER TABLE orders ADD COLUMN deleted_at TEXT")
+
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_created_at_projection")
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_status_created_at_projection")
+    create_projection_indexes(cursor, partial=True)
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_orders_tombstones
+        ON orders(deleted_at) WHERE deleted_at IS NOT NULL
+        """
+    )
+
+    create_changes_update_trigger(
+        cursor, "CASE WHEN NEW.deleted_at IS NULL THEN 'upsert' ELSE 'delete' END"
+    )
+
+    # Record this migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", (MIGRATION_NAME,))
+
+    conn.commit()
+
+    cursor.execute("PRAGMA auto_vacuum")
+    if cursor.fetchone()[0] != 2:  # 2 = INCREMENTAL
+        print(
+            "Purged orders only release disk space with incremental auto-vacuum; "
+            "run `python enable_incremental_vacuum.py` once while the API is stopped."
+        )
+
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} applied successfully.")
+
+
+def downgrade():
+    """Revert the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DELETE FROM orders WHERE deleted_at IS NOT NULL")
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_tombstones")
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_created_at_projection")
+    cursor.execute("DROP INDEX IF EXISTS idx_orders_status_created_at_projection")
+    create_changes_update_trigger(cursor, "'upsert'")
+    cursor.execute("ALTER TABLE orders DROP COLUMN deleted_at")
+    create_projection_indexes(cursor)
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} reverted successfully.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run database migration")
+    parser.add_argument(
+        "action",
+        choices=["upgrade", "downgrade"],
+        help="Migration action to perform",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
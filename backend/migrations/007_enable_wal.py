@@ -0,0 +1,82 @@
+"""
+Migration: Enable WAL journal mode
+Version: 007
+Description: Switches the database to write-ahead logging so readers do not
+block the writer. The WAL is checkpointed by the maintenance scheduler.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH, connect
+
+
+MIGRATION_NAME = "007_enable_wal"
+
+
+def upgrade():
+    """Apply the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Create migrations tracking table if it doesn't exist
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Check if this migration has already been applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+    if cursor.fetchone():
+        print(f"Migration {MIGRATION_NAME} already applied. Skipping.")
+        conn.close()
+        return
+
+    # journal_mode is persistent and cannot change inside a transaction
+    cursor.execute("PRAGMA journal_mode = WAL")
+
+    # Record this migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} applied successfully.")
+
+
+def downgrade():
+    """Revert the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA journal_mode = DELETE")
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} reverted successfully.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run database migration")
+    parser.add_argument(
+        "action",
+        choices=["upgrade", "downgrade"],
+        help="Migration action to perform",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
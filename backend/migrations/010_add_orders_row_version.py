@@ -0,0 +1,135 @@
+"""
+Migration: Add orders row version
+Version: 010
+Description: Adds a per-order version counter, bumped by a trigger on every
+update, so the ETag of GET /orders/{id} changes on every write. updated_at
+only has one-second resolution, so two writes in the same second used to
+keep the same ETag.
+
+The bump is itself an UPDATE of the row. The table version and change feed
+triggers (migrations 003 and 006) are recreated to skip it, so a write is
+still counted and logged once.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH, connect
+
+
+MIGRATION_NAME = "010_add_orders_row_version"
+
+TABLE_VERSION_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS trg_orders_version_update
+    AFTER UPDATE ON orders
+    {when}
+    BEGIN
+        UPDATE _table_versions
+        SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE name = 'orders';
+    END
+"""
+
+# As in migration 006: tombstoned orders are logged as deletes
+CHANGES_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS trg_orders_changes_update
+    AFTER UPDATE ON orders
+    {when}
+    BEGIN
+        DELETE FROM order_changes WHERE order_id IN (OLD.id, NEW.id);
+        INSERT INTO order_changes (order_id, op)
+        SELECT OLD.id, 'delete' WHERE OLD.id <> NEW.id;
+        INSERT INTO order_changes (order_id, op)
+        VALUES (NEW.id, CASE WHEN NEW.deleted_at IS NULL THEN 'upsert' ELSE 'delete' END);
+    END
+"""
+
+# Writes never set version themselves, so a changed version is the bump
+WRITE_ONLY = "WHEN NEW.version = OLD.version"
+
+
+def upgrade():
+    """Apply the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Create migrations tracking table if it doesn't exist
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Check if this migration has already been applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+    if cursor.fetchone():
+        print(f"Migration {MIGRATION_NAME} already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute("ALTER TABLE orders ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    # recursive_triggers is off, so the bump does not fire this trigger again
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_orders_row_version
+        AFTER UPDATE ON orders
+        {WRITE_ONLY}
+        BEGIN
+            UPDATE orders SET version = OLD.version + 1 WHERE id = NEW.id;
+        END
+        """
+    )
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_version_update")
+    cursor.execute(TABLE_VERSION_TRIGGER.format(when=WRITE_ONLY))
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_changes_update")
+    cursor.execute(CHANGES_TRIGGER.format(when=WRITE_ONLY))
+
+    # Record this migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} applied successfully.")
+
+
+def downgrade():
+    """Revert the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_row_version")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_version_update")
+    cursor.execute(TABLE_VERSION_TRIGGER.format(when=""))
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_changes_update")
+    cursor.execute(CHANGES_TRIGGER.format(when=""))
+    cursor.execute("ALTER TABLE orders DROP COLUMN version")
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} reverted successfully.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run database migration")
+    parser.add_argument(
+        "action",
+        choices=["upgrade", "downgrade"],
+        help="Migration action to perform",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
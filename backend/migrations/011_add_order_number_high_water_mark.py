@@ -0,0 +1,122 @@
+"""
+Migration: Add order number high-water mark
+Version: 011
+Description: Keeps the highest order number ever stored in a shard in
+_order_number_state, raised by a trigger on every insert. New numbers are
+taken above it (LAST_ORDER_NUMBER_SQL in app/routes/orders.py), so numbers
+of purged or archived orders are never handed out again.
+
+Starts at the highest number in the shard's orders and archive.
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH, archive_path, attach, connect, database_exists
+
+
+MIGRATION_NAME = "011_add_order_number_high_water_mark"
+
+ORDER_NUMBER = "CAST(SUBSTR(order_number, 5) AS INTEGER)"
+
+
+def upgrade():
+    """Apply the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Create migrations tracking table if it doesn't exist
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Check if this migration has already been applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+    if cursor.fetchone():
+        print(f"Migration {MIGRATION_NAME} already applied. Skipping.")
+        conn.close()
+        return
+
+    last_numbers = [f"SELECT MAX({ORDER_NUMBER}) AS last FROM main.orders"]
+    path = archive_path(DATABASE_PATH)
+    if database_exists(path):
+        attach(conn, path, "archive")
+        cursor.execute(
+            "SELECT 1 FROM archive.sqlite_master WHERE type = 'table' AND name = 'orders'"
+        )
+        if cursor.fetchone():
+            last_numbers.append(f"SELECT MAX({ORDER_NUMBER}) FROM archive.orders")
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _order_number_state (
+            name TEXT PRIMARY KEY,
+            last INTEGER NOT NULL DEFAULT 1000
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT OR IGNORE INTO _order_number_state (name, last)
+        SELECT 'orders', COALESCE(MAX(last), 1000) FROM ({" UNION ALL ".join(last_numbers)})
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_orders_number_high_water_mark
+        AFTER INSERT ON orders
+        BEGIN
+            UPDATE _order_number_state
+            SET last = CAST(SUBSTR(NEW.order_number, 5) AS INTEGER)
+            WHERE name = 'orders' AND last < CAST(SUBSTR(NEW.order_number, 5) AS INTEGER);
+        END
+        """
+    )
+
+    # Record this migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} applied successfully.")
+
+
+def downgrade():
+    """Revert the migration."""
+    conn = connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_orders_number_high_water_mark")
+    cursor.execute("DROP TABLE IF EXISTS _order_number_state")
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", (MIGRATION_NAME,))
+
+    conn.commit()
+    conn.close()
+    print(f"Migration {MIGRATION_NAME} reverted successfully.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run database migration")
+    parser.add_argument(
+        "action",
+        choices=["upgrade", "downgrade"],
+        help="Migration action to perform",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
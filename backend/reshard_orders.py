@@ -0,0 +1,75 @@
+"""
+Reshard Orders
+
+Moves every order to the shard its id hashes to under the current
+DATABASE_SHARDS. Run it after raising DATABASE_SHARDS (and running
+`python migrate.py upgrade`, which creates the new shard files) and before
+starting the API. Rows move in batches; a move that was interrupted is
+completed by running the script again. If the target shard holds another
+order with the same order number, the script stops without moving that
+batch.
+"""
+
+import argparse
+import sqlite3
+
+from app.database import DATABASE_SHARDS, connect, shard_for, shard_paths
+
+BATCH_SIZE = 500
+
+
+def reshard_orders(batch_size: int = BATCH_SIZE) -> int:
+    paths = shard_paths()
+    moved = 0
+    for source, path in enumerate(paths):
+        conn = connect(path)
+        conn.create_function("shard_for", 1, shard_for, deterministic=True)
+        for target, target_path in enumerate(paths):
+            if target != source:
+                conn.execute(f"ATTACH DATABASE ? AS shard{target}", (target_path,))
+
+        while True:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, shard_for(id) FROM orders WHERE shard_for(id) <> ? LIMIT ?",
+                (source, batch_size),
+            )
+            misplaced = cursor.fetchall()
+            if not misplaced:
+                break
+            for order_id, target in misplaced:
+                # The row may already be there from an interrupted run. Any other
+                # conflict (a different order with the same order_number) fails
+                # the insert, and the batch is rolled back instead of losing the row.
+                try:
+                    cursor.execute(
+                        f"""
+                        INSERT INTO shard{target}.orders SELECT * FROM main.orders
+                        WHERE id = ? AND NOT EXISTS (SELECT 1 FROM shard{target}.orders WHERE id = ?)
+                        """,
+                        (order_id, order_id),
+                    )
+                except sqlite3.IntegrityError as e:
+                    conn.rollback()
+                    conn.close()
+                    raise RuntimeError(
+                        f"Cannot move order {order_id} to shard {target}: {e}. "
+                        "Nothing in this batch was moved; resolve the conflict and run again."
+                    ) from e
+                cursor.execute("DELETE FROM main.orders WHERE id = ?", (order_id,))
+            conn.commit()
+            moved += len(misplaced)
+        conn.close()
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move orders to the shard of their id")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    try:
+        moved = reshard_orders(args.batch_size)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    print(f"Moved {moved} orders across {DATABASE_SHARDS} shards.")
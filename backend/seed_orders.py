@@ -7,15 +7,15 @@ aligned with the sample data in backend/README.md.
 
 import os
 import sqlite3
-import uuid
 import random
 from datetime import datetime, timedelta
 
-from app.database import DATABASE_PATH
+from app.database import connect, shard_paths, utc_now
+from app.routes.orders import new_order_id, order_number_shard
 
 
 def ensure_orders_table_exists():
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect(shard_paths()[0])
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -147,6 +147,7 @@ NAMES = [
 ]
 
 STATUSES = ["pending", "completed", "refunded"]
+STATUS_WEIGHTS = [5, 10, 2]
 PAYMENT_BY_STATUS = {
     "pending": ["unpaid", "paid"],  # mostly unpaid
     "completed": ["paid"],
@@ -160,7 +161,7 @@ def generate_additional_orders(start_ord_num: int, count: int):
     for i in range(count):
         order_number = f"#ORD{start_ord_num + i}"
         name, email, avatar = random.choice(NAMES)
-        status = random.choices(STATUSES, weights=[5, 10, 2], k=1)[0]
+        status = random.choices(STATUSES, weights=STATUS_WEIGHTS, k=1)[0]
         payment_status = random.choice(PAYMENT_BY_STATUS[status])
         # amounts: 5.00 - 999.99
         total_amount = round(random.uniform(5, 999.99), 2)
@@ -195,14 +196,25 @@ def seed_orders(target_count: int = 220):
     additional = generate_additional_orders(start_ord_num=1009, count=additional_needed)
     all_orders = samples + additional
 
-    now_iso = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    now_iso = utc_now()
 
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    # Each order goes to the shard of its number, like the ones the API creates
+    # (a single file unless DATABASE_SHARDS > 1)
+    conns = [connect(path) for path in shard_paths()]
+
+    # order_number is only unique within one file, so look across all shards
+    existing = set()
+    for conn in conns:
+        existing.update(row[0] for row in conn.execute("SELECT order_number FROM orders"))
 
     # Ensure uniqueness on order_number; skip duplicates if already present
     inserted = 0
     for o in all_orders:
+        if o["order_number"] in existing:
+            continue
+        shard = order_number_shard(int(o["order_number"][4:]))
+        order_id = new_order_id(shard)
+        cursor = conns[shard].cursor()
         try:
             cursor.execute(
                 """
@@ -213,7 +225,7 @@ def seed_orders(target_count: int = 220):
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
-                    str(uuid.uuid4()),
+                    order_id,
                     o["order_number"],
                     o["customer_name"],
                     o["customer_email"],
@@ -231,8 +243,9 @@ def seed_orders(target_count: int = 220):
             # order_number duplicate (unique) — skip
             continue
 
-    conn.commit()
-    conn.close()
+    for conn in conns:
+        conn.commit()
+        conn.close()
     print(f"Seeded {inserted} orders.")
 
 
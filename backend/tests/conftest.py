@@ -0,0 +1,57 @@
+"""Shared test setup: a fresh, migrated and seeded database per session.
+
+DATABASE_PATH, DATABASE_SHARDS and the other settings are read when the app
+modules are imported, so the database path is set here, before any test
+module imports them.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Never a developer's app.db
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="orders-tests-"), "app.db")
+# Small enough for tests/test_changes.py to write past it
+os.environ["ORDER_CHANGES_RETENTION"] = "2000"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient on the seeded database (startup tasks are not run)."""
+    from fastapi.testclient import TestClient
+
+    import seed_orders
+    from app.main import app
+    from migrate import run_migrations
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations("upgrade")
+        seed_orders.seed_orders()
+    return TestClient(app)
+
+
+ORDER = {
+    "customer": {"name": "Test Customer", "email": "test@example.com"},
+    "total_amount": 12.5,
+    "status": "pending",
+    "payment_status": "unpaid",
+}
+
+
+@pytest.fixture
+def create_order(client):
+    """Create an order through the API and return it."""
+
+    def create(**fields) -> dict:
+        response = client.post("/orders", json={**ORDER, **fields})
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return create
@@ -0,0 +1,35 @@
+"""Archived and purged orders keep their order numbers out of reuse."""
+
+from app.archive import archive_orders, attach_archive
+from app.database import DATABASE_SHARDS, get_db
+from app.purger import purge_deleted_orders
+
+
+def order_numbers() -> list:
+    """Order numbers in orders and the archives of every shard."""
+    numbers = []
+    for shard in range(DATABASE_SHARDS):
+        with get_db(shard) as conn:
+            tables = ["main.orders"] + (["archive.orders"] if attach_archive(conn, shard) else [])
+            for table in tables:
+                numbers.extend(row[0] for row in conn.execute(f"SELECT order_number FROM {table}"))
+    return numbers
+
+
+def number(order: dict) -> int:
+    return int(order["order_number"][4:])
+
+
+def test_numbers_not_reused_after_archive_and_purge(client, create_order):
+    create_order(status="completed", payment_status="paid")
+    assert archive_orders(after_days=-1, pause=0)["archived"] > 0
+
+    # The highest number now belongs to a live order; delete and purge it
+    deleted = create_order()
+    assert client.delete(f"/orders/{deleted['id']}").status_code == 204
+    assert purge_deleted_orders(pause=0)["purged"] >= 1
+
+    created = create_order()
+    assert number(created) > number(deleted)
+    numbers = order_numbers()
+    assert len(numbers) == len(set(numbers))
@@ -0,0 +1,129 @@
+"""GET /orders/changes: cursor semantics, compaction, retention and long polling.
+
+The 501 answer with sharded storage is tested in tests/test_sharding.py.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from app.database import DATABASE_SHARDS, get_db
+from app.routes.orders import CHANGES_RECHECK_SECONDS
+
+pytestmark = pytest.mark.skipif(DATABASE_SHARDS > 1, reason="no change feed when sharded")
+
+RETENTION_CHECK_EVERY = 1000
+
+
+def read_all(client, since: int, limit: int = 1000):
+    """(changes, last_seq) after `since`, following has_more."""
+    changes = []
+    while True:
+        body = client.get(f"/orders/changes?since={since}&limit={limit}").json()
+        changes.extend(body["changes"])
+        assert body["last_seq"] >= since
+        since = body["last_seq"]
+        if not body["has_more"]:
+            return changes, since
+
+
+def head(client) -> int:
+    return read_all(client, 0)[1]
+
+
+def import_orders(client, count: int) -> None:
+    line = json.dumps(
+        {
+            "customer": {"name": "Feed", "email": "feed@example.com"},
+            "total_amount": 1,
+            "status": "pending",
+            "payment_status": "unpaid",
+        }
+    )
+    response = client.post("/orders/import", content="\n".join([line] * count))
+    assert response.json()["inserted"] == count
+
+
+def test_cursor_and_compaction(client, create_order):
+    since = head(client)
+    first = create_order()
+    second = create_order()
+    client.put(f"/orders/{first['id']}", json={"status": "completed"})
+
+    changes, last_seq = read_all(client, since)
+    # One entry per order, its latest state, in commit order of the last write
+    assert [(change["op"], change["id"]) for change in changes] == [
+        ("upsert", second["id"]),
+        ("upsert", first["id"]),
+    ]
+    assert changes[1]["order"]["status"] == "completed"
+    assert [change["seq"] for change in changes] == sorted(change["seq"] for change in changes)
+    assert last_seq == changes[-1]["seq"]
+
+    # Paging with limit=1 returns the same entries
+    paged = client.get(f"/orders/changes?since={since}&limit=1").json()
+    assert paged["has_more"] and paged["changes"] == changes[:1]
+
+    client.delete(f"/orders/{second['id']}")
+    changes, next_seq = read_all(client, last_seq)
+    assert [(change["op"], change["id"], change["order"]) for change in changes] == [
+        ("delete", second["id"], None)
+    ]
+
+    # Nothing new: same cursor back, no more pages
+    body = client.get(f"/orders/changes?since={next_seq}").json()
+    assert body == {"changes": [], "last_seq": next_seq, "has_more": False}
+
+
+def test_long_poll_wakes_on_commit(client, create_order):
+    since = head(client)
+    result = {}
+
+    def poll():
+        started = time.monotonic()
+        result["body"] = client.get(f"/orders/changes?since={since}&wait=10").json()
+        result["elapsed"] = time.monotonic() - started
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.2)
+    order = create_order()
+    poller.join(timeout=10)
+
+    assert [change["id"] for change in result["body"]["changes"]] == [order["id"]]
+    # Woken by the commit, not by the periodic recheck
+    assert result["elapsed"] < 0.2 + CHANGES_RECHECK_SECONDS * 0.8
+
+
+def test_long_poll_times_out_empty(client):
+    since = head(client)
+    started = time.monotonic()
+    body = client.get(f"/orders/changes?since={since}&wait=0.3").json()
+    assert time.monotonic() - started >= 0.3
+    assert body == {"changes": [], "last_seq": since, "has_more": False}
+
+
+def test_expired_cursor_after_retention(client):
+    since = head(client)
+    with get_db() as conn:
+        retention = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'trg_order_changes_retention'"
+        ).fetchone()[0]
+    assert "NEW.seq > 2000" in retention
+
+    # Write past the next retention check above the retention window
+    target = max(since, 2000) // RETENTION_CHECK_EVERY * RETENTION_CHECK_EVERY + RETENTION_CHECK_EVERY
+    import_orders(client, target - since + 1)
+    with get_db() as conn:
+        purged_through = conn.execute(
+            "SELECT purged_through FROM _change_feed_state WHERE name = 'orders'"
+        ).fetchone()[0]
+    assert purged_through == target - 2000
+
+    assert client.get("/orders/changes?since=0").status_code == 410
+    assert client.get(f"/orders/changes?since={purged_through - 1}").status_code == 410
+    response = client.get(f"/orders/changes?since={purged_through}&limit=5")
+    assert response.status_code == 200
+    assert all(change["seq"] > purged_through for change in response.json()["changes"])
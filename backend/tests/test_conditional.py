@@ -0,0 +1,31 @@
+"""Conditional GETs stay correct with one-second timestamps."""
+
+import time
+from email.utils import formatdate
+
+
+def start_of_second() -> None:
+    time.sleep(1.05 - time.time() % 1)
+
+
+def test_same_second_writes_are_not_hidden(client, create_order):
+    start_of_second()
+    order = create_order()
+    first = client.get(f"/orders/{order['id']}")
+    # The second is not over: only the ETag is a safe validator
+    assert "last-modified" not in first.headers
+
+    now = formatdate(time.time(), usegmt=True)
+    assert client.put(f"/orders/{order['id']}", json={"status": "completed"}).status_code == 200
+    assert client.get(f"/orders/{order['id']}", headers={"If-Modified-Since": now}).status_code == 200
+    conditional = {"If-None-Match": first.headers["etag"]}
+    assert client.get(f"/orders/{order['id']}", headers=conditional).status_code == 200
+
+
+def test_if_modified_since_once_settled(client, create_order):
+    order = create_order()
+    start_of_second()
+    response = client.get(f"/orders/{order['id']}")
+    last_modified = response.headers["last-modified"]
+    conditional = {"If-Modified-Since": last_modified}
+    assert client.get(f"/orders/{order['id']}", headers=conditional).status_code == 304
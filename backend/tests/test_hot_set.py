@@ -0,0 +1,85 @@
+"""The orders hot set answers list, stats and dashboard reads like SQLite does."""
+
+import sqlite3
+from datetime import date
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.database import DATABASE_PATH, DATABASE_SHARDS  # noqa: E402
+from app.hot_set import hot_set  # noqa: E402
+from app.purger import purge_deleted_orders  # noqa: E402
+
+pytestmark = pytest.mark.skipif(DATABASE_SHARDS > 1, reason="the hot set is off when sharded")
+
+READS = [
+    "/orders?limit=100",
+    "/orders?status=pending&limit=7&page=2",
+    "/orders?status=refunded&limit=100",
+    "/orders?status=completed&page=40",
+    "/orders?fields=id,customer,total_amount&limit=50&page=3",
+    "/orders/stats",
+    "/orders/dashboard",
+    "/orders/dashboard?status=pending&limit=25",
+    "/orders/dashboard?status=completed&fields=id,status",
+]
+
+
+@pytest.fixture
+def hot(client, monkeypatch):
+    monkeypatch.setattr(hot_set, "enabled", True)
+    monkeypatch.setattr(hot_set, "loaded", False)
+    hot_set.load()
+    assert hot_set.loaded
+
+
+def assert_matches_sql(client):
+    for path in READS:
+        from_hot_set = client.get(path).json()
+        assert hot_set.loaded, "hot set unloaded, reads fell back to SQLite"
+        hot_set.loaded = False
+        try:
+            from_sql = client.get(path).json()
+        finally:
+            hot_set.loaded = True
+        assert from_hot_set == from_sql, path
+
+
+def test_reads_match_sql_after_writes(client, create_order, hot):
+    assert_matches_sql(client)
+
+    this_month = date.today().isoformat()
+    ids = [create_order(order_date=this_month)["id"] for _ in range(5)]
+    assert_matches_sql(client)
+
+    client.put(f"/orders/{ids[0]}", json={"status": "refunded", "total_amount": 5.5})
+    client.delete(f"/orders/{ids[1]}")
+    listed = [order["id"] for order in client.get("/orders?limit=100").json()["orders"]]
+    client.put("/orders/bulk/status", json={"order_ids": listed[:20], "status": "completed"})
+    client.patch("/orders/bulk", json={"order_ids": listed[20:25], "patch": {"payment_status": "paid"}})
+    client.request("DELETE", "/orders/bulk", json={"order_ids": listed[25:35]})
+    client.post("/orders/bulk/duplicate", json={"order_ids": listed[35:40]})
+    lines = [
+        f'{{"customer": {{"name": "Import", "email": "i@example.com"}}, "total_amount": 2, '
+        f'"status": "pending", "payment_status": "unpaid", "order_date": "{this_month}"}}'
+    ] * 50
+    response = client.post(
+        "/orders/import", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, response.text
+    assert_matches_sql(client)
+
+    # A write from another process is picked up through the table version
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.execute(
+        "UPDATE orders SET status = 'refunded' "
+        "WHERE id IN (SELECT id FROM orders WHERE deleted_at IS NULL LIMIT 3)"
+    )
+    conn.commit()
+    conn.close()
+    assert_matches_sql(client)
+
+    # Purged tombstones
+    purge_deleted_orders(pause=0)
+    assert_matches_sql(client)
@@ -0,0 +1,61 @@
+"""Streaming imports: BOMs, long lines and aborted uploads."""
+
+import asyncio
+
+from app.ingest import MAX_LINE_LENGTH
+from app.main import app
+
+
+def test_csv_byte_order_mark(client):
+    body = "\ufeffname\nfirst\nsecond\n".encode("utf-8")
+    response = client.post("/items/import", content=body, headers={"Content-Type": "text/csv"})
+    assert response.json() == {
+        "inserted": 2,
+        "error_count": 0,
+        "errors": [],
+        "errors_truncated": False,
+    }
+
+
+def test_long_line_in_many_chunks(client):
+    def body():
+        yield b'{"name": "before"}\n'
+        for _ in range(MAX_LINE_LENGTH // 1000 + 1):
+            yield b"x" * 1000
+        yield b'\n{"name": "after"}\n'
+
+    result = client.post("/items/import", content=body()).json()
+    assert result["inserted"] == 2
+    assert [error["line"] for error in result["errors"]] == [2]
+
+
+def test_client_disconnect_mid_upload(client):
+    messages = [
+        {"type": "http.request", "body": b'{"name": "partial"}\n', "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "path": "/items/import",
+        "raw_path": b"/items/import",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+        "scheme": "http",
+        "root_path": "",
+    }
+    asyncio.run(app(scope, receive, send))
+    assert sent[0]["type"] == "http.response.start"
+    assert sent[0]["status"] == 400
@@ -0,0 +1,472 @@
+"""
+Workload Generator and Replay
+
+Production-shaped data and traffic for capacity planning:
+
+- generate: inserts synthetic orders drawn in bulk with numpy. Customers
+  follow a Zipf distribution (a few customers place most orders), order
+  dates follow month and weekday seasonality with growth over the range,
+  created_at times peak in the afternoon, and status and payment follow
+  STATUS_WEIGHTS and PAYMENT_BY_STATUS from seed_orders.py, with recent
+  orders more often still pending.
+- synth: writes a request trace from a request mix (list, filter, stats,
+  bulk, ... ratios) with Poisson arrivals at --rate. The trace format is
+  the one recorded from live traffic with WORKLOAD_RECORD (app/workload.py).
+- replay: sends a trace to the app in-process (ASGI) or to --url, open-loop:
+  at the trace's times (scaled by --speed) or at a fixed --rate, whatever
+  the response times. Reports latency percentiles per request kind.
+
+Synthesized traces refer to orders through placeholders, "{id}" in a path
+and "{ids:N}" as a body value, which replay fills with ids of live orders.
+The same --seed gives the same data, trace and replay.
+
+Usage (from backend/; generate and synth need numpy):
+    python workload.py generate --orders 100000 [--customers 5000] [--zipf 1.1] [--start 2024-01-01] [--days 365]
+    python workload.py synth trace.ndjson [--requests 10000] [--rate 50] [--mix list=45,filter=20,stats=10,...]
+    python workload.py replay trace.ndjson [--rate 100 | --speed 2] [--concurrency 64] [--url http://localhost:8000]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from app.database import connect, shard_paths
+from app.routes.orders import LAST_ORDER_NUMBER_SQL, new_order_id, order_number_shard
+from app.workload import request_kind
+from seed_orders import PAYMENT_BY_STATUS, STATUS_WEIGHTS, STATUSES
+
+FIRST_NAMES = [
+    "John", "Jane", "Alex", "Maria", "Michael", "Emily", "Chris", "Sarah", "David", "Laura",
+    "Esther", "Denise", "Clint", "Darin", "Jacquelyn", "Erin", "Gretchen", "Stewart", "Nina", "Omar",
+]
+LAST_NAMES = [
+    "Doe", "Smith", "Johnson", "Garcia", "Brown", "Davis", "Wilson", "Miller", "Moore", "Taylor",
+    "Kiehn", "Kuhn", "Hoppe", "Deckow", "Robel", "Bins", "Quitz", "Kulas", "Patel", "Nguyen",
+]
+# Relative order volume per month (Jan-Dec) and weekday (Mon-Sun)
+MONTH_WEIGHTS = [0.8, 0.75, 0.9, 0.9, 0.95, 0.95, 0.9, 0.95, 1.0, 1.05, 1.4, 1.7]
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.05, 1.15, 1.3, 1.2]
+# Relative volume per hour of day, 00-23
+HOUR_WEIGHTS = [
+    2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 9, 10, 11, 10, 10, 11, 12, 12, 13, 14, 13, 10, 7, 4,
+]
+# Daily volume at the end of the range relative to its start
+GROWTH = 1.5
+# Share of orders without an order_date, as in seed_orders.py
+MISSING_DATE_SHARE = 0.05
+# Pending share of the newest orders; it halves every PENDING_HALF_LIFE_DAYS
+# towards the STATUS_WEIGHTS share
+RECENT_PENDING_SHARE = 0.7
+PENDING_HALF_LIFE_DAYS = 7
+# Share of the first PAYMENT_BY_STATUS option when there are several ("mostly unpaid")
+FIRST_PAYMENT_SHARE = 0.8
+AMOUNT_MEDIAN = 60.0
+AMOUNT_SIGMA = 0.9
+INSERT_BATCH_SIZE = 5000
+
+DEFAULT_MIX = "list=45,filter=20,stats=10,dashboard=10,get=8,create=3,update=2,bulk=2"
+SYNTH_KINDS = ("list", "filter", "stats", "dashboard", "get", "create", "update", "bulk")
+PAGE_LIMIT = 10
+# Chance that a reader goes on to the next page
+NEXT_PAGE_SHARE = 0.4
+BULK_SIZE = 10
+# Pages of 100 ids fetched before a replay to fill placeholders
+ID_POOL_PAGES = 10
+IDS_PLACEHOLDER = re.compile(r"^\{ids:(\d+)\}$")
+
+
+def require_numpy() -> None:
+    if np is None:
+        sys.exit("numpy is required: pip install numpy")
+
+
+def customer(number: int) -> tuple:
+    """(name, email, avatar) of customer `number`."""
+    first = FIRST_NAMES[number % len(FIRST_NAMES)]
+    last = LAST_NAMES[number // len(FIRST_NAMES) % len(LAST_NAMES)]
+    return (
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{number}@example.com",
+        f"/avatars/{first.lower()}.jpg",
+    )
+
+
+def zipf_customers(rng, count: int, customers: int, exponent: float):
+    """`count` customer numbers; the k-th most active customer weighs 1 / k**exponent."""
+    weights = np.arange(1, customers + 1, dtype=float) ** -exponent
+    ranks = rng.choice(customers, size=count, p=weights / weights.sum())
+    # Activity does not follow the customer number
+    return rng.permutation(customers)[ranks]
+
+
+def draw_orders(
+    count: int, customers: int, zipf: float, start: str, days: int, seed: int
+) -> Dict[str, list]:
+    """Column lists of `count` synthetic orders (see the module docstring)."""
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64(start, "D") + np.arange(days)
+    months = dates.astype("datetime64[M]").astype(int) % 12
+    weekdays = (dates.astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+    weights = (
+        np.array(MONTH_WEIGHTS)[months]
+        * np.array(WEEKDAY_WEIGHTS)[weekdays]
+        * (1 + (GROWTH - 1) * np.arange(days) / max(days - 1, 1))
+    )
+    day = rng.choice(days, size=count, p=weights / weights.sum())
+    hours = np.array(HOUR_WEIGHTS, dtype=float)
+    seconds = rng.choice(24, size=count, p=hours / hours.sum()) * 3600 + rng.integers(
+        0, 3600, size=count
+    )
+    created = dates[day].astype("datetime64[s]") + seconds
+    created_at = np.datetime_as_string(created, unit="s")
+    order_date = np.where(
+        rng.random(count) < MISSING_DATE_SHARE, None, np.datetime_as_string(dates[day], unit="D")
+    )
+
+    status_weights = np.array(STATUS_WEIGHTS, dtype=float) / sum(STATUS_WEIGHTS)
+    age = days - 1 - day
+    pending_share = status_weights[0] + (RECENT_PENDING_SHARE - status_weights[0]) * 0.5 ** (
+        age / PENDING_HALF_LIFE_DAYS
+    )
+    rest = status_weights[1:] / status_weights[1:].sum()
+    status = np.where(
+        rng.random(count) < pending_share, 0, 1 + rng.choice(len(rest), size=count, p=rest)
+    )
+    payment = np.empty(count, dtype=object)
+    for code, name in enumerate(STATUSES):
+        options = PAYMENT_BY_STATUS[name]
+        selected = status == code
+        if len(options) == 1:
+            payment[selected] = options[0]
+            continue
+        others = (1 - FIRST_PAYMENT_SHARE) / (len(options) - 1)
+        payment[selected] = rng.choice(
+            options, size=int(selected.sum()), p=[FIRST_PAYMENT_SHARE] + [others] * (len(options) - 1)
+        )
+    amount = np.clip(rng.lognormal(np.log(AMOUNT_MEDIAN), AMOUNT_SIGMA, size=count), 5, 999.99)
+
+    return {
+        "customer": zipf_customers(rng, count, customers, zipf).tolist(),
+        "order_date": order_date.tolist(),
+        "status": np.array(STATUSES)[status].tolist(),
+        "total_amount": np.round(amount, 2).tolist(),
+        "payment_status": payment.tolist(),
+        "created_at": created_at.tolist(),
+    }
+
+
+def generate_orders(
+    count: int,
+    customers: int = 5000,
+    zipf: float = 1.1,
+    start: str = "2024-01-01",
+    days: int = 365,
+    seed: int = 7,
+) -> int:
+    """Insert `count` synthetic orders, numbered after the highest existing one."""
+    columns = draw_orders(count, customers, zipf, start, days, seed)
+    conns = [connect(path) for path in shard_paths()]
+    try:
+        number = max(conn.execute(LAST_ORDER_NUMBER_SQL).fetchone()[0] for conn in conns) + 1
+        pool = {}
+        batches: Dict[int, list] = defaultdict(list)
+        for customer_number, order_date, status, amount, payment, created_at in zip(
+            columns["customer"],
+            columns["order_date"],
+            columns["status"],
+            columns["total_amount"],
+            columns["payment_status"],
+            columns["created_at"],
+        ):
+            if customer_number not in pool:
+                pool[customer_number] = customer(customer_number)
+            # On the shard of its number, as the API numbers per shard
+            shard = order_number_shard(number)
+            order_id = new_order_id(shard)
+            batches[shard].append(
+                (order_id, f"#ORD{number}", *pool[customer_number], order_date, status,
+                 amount, payment, created_at, created_at)
+            )
+            number += 1
+            if len(batches[shard]) >= INSERT_BATCH_SIZE:
+                insert_orders(conns[shard], batches.pop(shard))
+        for shard, rows in batches.items():
+            insert_orders(conns[shard], rows)
+    finally:
+        for conn in conns:
+            conn.close()
+    return count
+
+
+def insert_orders(conn, rows: list) -> None:
+    conn.executemany(
+        """
+        INSERT INTO orders (
+            id, order_number, customer_name, customer_email, customer_avatar,
+            order_date, status, total_amount, payment_status, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.commit()
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in SYNTH_KINDS:
+            sys.exit(f"Unknown request kind {kind!r}; choose from {', '.join(SYNTH_KINDS)}")
+        weights[kind] = float(weight)
+    return weights
+
+
+def synth_trace(
+    requests: int, rate: float, mix: Dict[str, float], customers: int = 5000, seed: int = 7
+) -> List[dict]:
+    """A trace of `requests` requests drawn from `mix`, arriving at `rate` per second."""
+    rng = np.random.default_rng(seed)
+    kinds = list(mix)
+    weights = np.array([mix[kind] for kind in kinds], dtype=float)
+    drawn = np.array(kinds)[rng.choice(len(kinds), size=requests, p=weights / weights.sum())]
+    at = np.cumsum(rng.exponential(1 / rate, size=requests))
+    pages = rng.geometric(1 - NEXT_PAGE_SHARE, size=requests)
+    statuses = rng.choice(STATUSES, size=requests)
+    buyers = zipf_customers(rng, requests, customers, 1.1)
+    amounts = np.round(np.clip(rng.lognormal(np.log(AMOUNT_MEDIAN), AMOUNT_SIGMA, requests), 5, 999.99), 2)
+
+    entries = []
+    for i, kind in enumerate(drawn.tolist()):
+        body = None
+        if kind == "list":
+            method, path = "GET", f"/orders?page={pages[i]}&limit={PAGE_LIMIT}"
+        elif kind == "filter":
+            method, path = "GET", f"/orders?status={statuses[i]}&page={pages[i]}&limit={PAGE_LIMIT}"
+        elif kind == "stats":
+            method, path = "GET", "/orders/stats"
+        elif kind == "dashboard":
+            method, path = "GET", f"/orders/dashboard?limit={PAGE_LIMIT}"
+        elif kind == "get":
+            method, path = "GET", "/orders/{id}"
+        elif kind == "create":
+            name, email, avatar = customer(int(buyers[i]))
+            method, path = "POST", "/orders"
+            body = {
+                "customer": {"name": name, "email": email, "avatar": avatar},
+                "total_amount": float(amounts[i]),
+                "status": "pending",
+                "payment_status": "unpaid",
+            }
+        elif kind == "update":
+            method, path, body = "PUT", "/orders/{id}", {"status": str(statuses[i])}
+        else:
+            method, path = "PUT", "/orders/bulk/status"
+            body = {"order_ids": f"{{ids:{BULK_SIZE}}}", "status": str(statuses[i])}
+        entries.append(
+            {"at": round(float(at[i]), 4), "kind": kind, "method": method, "path": path, "body": body}
+        )
+    return entries
+
+
+def load_trace(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    for entry in entries:
+        entry.setdefault("kind", request_kind(entry["method"], *entry["path"].partition("?")[::2]))
+    return sorted(entries, key=lambda entry: entry["at"])
+
+
+def fill_placeholders(value, rng: random.Random, ids: List[str]):
+    """Replace "{id}" and "{ids:N}" with random ids from `ids`."""
+    if isinstance(value, str):
+        match = IDS_PLACEHOLDER.match(value)
+        if match:
+            return rng.sample(ids, min(int(match.group(1)), len(ids)))
+        if "{id}" in value:
+            return value.replace("{id}", rng.choice(ids) if ids else "missing")
+        return value
+    if isinstance(value, dict):
+        return {key: fill_placeholders(item, rng, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill_placeholders(item, rng, ids) for item in value]
+    return value
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def live_order_ids(client) -> List[str]:
+    ids = []
+    for page in range(1, ID_POOL_PAGES + 1):
+        response = await client.get("/orders", params={"fields": "id", "limit": 100, "page": page})
+        orders = response.json().get("orders", []) if response.status_code == 200 else []
+        ids.extend(order["id"] for order in orders)
+        if len(orders) < 100:
+            break
+    return ids
+
+
+async def replay(
+    entries: List[dict],
+    rate: Optional[float] = None,
+    speed: float = 1.0,
+    concurrency: int = 64,
+    url: Optional[str] = None,
+    seed: int = 7,
+) -> dict:
+    """Send the trace open-loop; returns a report with latencies per kind."""
+    import httpx
+
+    app = None
+    if url is None:
+        from app.main import app
+
+        await app.router.startup()
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://workload", timeout=60)
+    else:
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    lags: List[float] = []
+    rng = random.Random(seed)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(entry: dict, path: str, body) -> None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(entry["method"], path, json=body)
+            outcome = f"{response.status_code // 100}xx"
+        except httpx.HTTPError:
+            outcome = "failed"
+        finally:
+            slots.release()
+        latencies[entry["kind"]].append(time.perf_counter() - started)
+        statuses[entry["kind"]][outcome] += 1
+
+    try:
+        ids = await live_order_ids(client)
+        loop = asyncio.get_running_loop()
+        tasks = []
+        first = entries[0]["at"] if entries else 0
+        start = loop.time()
+        for i, entry in enumerate(entries):
+            due = start + (i / rate if rate else (entry["at"] - first) / speed)
+            if due > loop.time():
+                await asyncio.sleep(due - loop.time())
+            # Beyond `concurrency` requests in flight, sends fall behind schedule
+            await slots.acquire()
+            lags.append(max(0.0, loop.time() - due))
+            path = fill_placeholders(entry["path"], rng, ids)
+            body = fill_placeholders(entry.get("body"), rng, ids)
+            tasks.append(asyncio.create_task(send(entry, path, body)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    def summary(values: List[float]) -> dict:
+        return {
+            f"p{int(q * 100)}_ms": round(percentile(values, q) * 1000, 2) if values else None
+            for q in (0.5, 0.95, 0.99)
+        }
+
+    return {
+        "requests": len(entries),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(entries) / elapsed, 1) if elapsed else None,
+        "schedule_lag": {**summary(lags), "max_ms": round(max(lags, default=0) * 1000, 2)},
+        "kinds": {
+            kind: {"count": len(values), "responses": dict(statuses[kind]), **summary(values)}
+            for kind, values in sorted(latencies.items())
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['requests']} requests in {report['seconds']}s "
+        f"({report['requests_per_second']}/s), schedule lag p99 "
+        f"{report['schedule_lag']['p99_ms']} ms, max {report['schedule_lag']['max_ms']} ms"
+    )
+    print(f"{'kind':<12} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  responses")
+    for kind, stats in report["kinds"].items():
+        responses = ", ".join(f"{name}: {n}" for name, n in sorted(stats["responses"].items()))
+        print(
+            f"{kind:<12} {stats['count']:>7} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+            f"{stats['p99_ms']:>9}  {responses}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate orders and replay request traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Insert synthetic orders")
+    generate.add_argument("--orders", type=int, default=100000)
+    generate.add_argument("--customers", type=int, default=5000)
+    generate.add_argument("--zipf", type=float, default=1.1, help="Customer skew exponent")
+    generate.add_argument("--start", default="2024-01-01", help="First order date")
+    generate.add_argument("--days", type=int, default=365, help="Days of order dates")
+    generate.add_argument("--seed", type=int, default=7)
+
+    synth = commands.add_parser("synth", help="Write a request trace from a mix")
+    synth.add_argument("trace", help="NDJSON file to write")
+    synth.add_argument("--requests", type=int, default=10000)
+    synth.add_argument("--rate", type=float, default=50, help="Mean requests per second")
+    synth.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight,...")
+    synth.add_argument("--customers", type=int, default=5000)
+    synth.add_argument("--seed", type=int, default=7)
+
+    replay_parser = commands.add_parser("replay", help="Send a trace to the API")
+    replay_parser.add_argument("trace", help="NDJSON trace (synth or WORKLOAD_RECORD)")
+    pacing = replay_parser.add_mutually_exclusive_group()
+    pacing.add_argument("--rate", type=float, help="Fixed requests per second instead of trace times")
+    pacing.add_argument("--speed", type=float, default=1.0, help="Trace time multiplier")
+    replay_parser.add_argument("--concurrency", type=int, default=64, help="Max requests in flight")
+    replay_parser.add_argument("--url", help="Base URL of a running API (default: in-process)")
+    replay_parser.add_argument("--limit", type=int, help="Replay only the first N requests")
+    replay_parser.add_argument("--seed", type=int, default=7)
+    replay_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        require_numpy()
+        started = time.perf_counter()
+        generate_orders(args.orders, args.customers, args.zipf, args.start, args.days, args.seed)
+        print(f"Generated {args.orders} orders in {time.perf_counter() - started:.1f}s.")
+    elif args.command == "synth":
+        require_numpy()
+        trace = synth_trace(args.requests, args.rate, parse_mix(args.mix), args.customers, args.seed)
+        with open(args.trace, "w", encoding="utf-8") as f:
+            for entry in trace:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        print(f"Wrote {len(trace)} requests ({trace[-1]['at'] if trace else 0:.0f}s) to {args.trace}.")
+    else:
+        entries = load_trace(args.trace)[: args.limit]
+        report = asyncio.run(
+            replay(entries, args.rate, args.speed, args.concurrency, args.url, args.seed)
+        )
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)